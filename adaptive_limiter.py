@@ -0,0 +1,133 @@
+import time
+import random
+import logging
+import threading
+import requests
+
+# 并发数的初始值和上下限
+ADAPTIVE_INITIAL = 8
+ADAPTIVE_MIN = 2
+ADAPTIVE_MAX = 64
+# 平均延迟超过基线的倍数时不再增加并发
+LATENCY_TOLERANCE = 1.5
+# 重试退避的基数和上限(秒)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """带完全抖动的指数退避，避免所有线程同时重试"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveLimiter:
+    """AIMD自适应并发控制
+
+    每完成一轮(当前并发数个请求)比较吞吐量和平均延迟：吞吐量上升且延迟没有明显变差时并发加一；
+    出现连接错误、429或5xx时并发减半。同一批在途请求的失败只减半一次，
+    减半后又失败了减半前并发数个请求时再次减半，持续失败时逐步降到下限。
+    """
+
+    def __init__(self, initial=ADAPTIVE_INITIAL, min_limit=ADAPTIVE_MIN, max_limit=ADAPTIVE_MAX):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.peak = 0
+        self.successes = 0
+        self.failures = 0
+        self.condition = threading.Condition()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.window_latency = 0.0
+        self.last_throughput = 0.0
+        self.base_latency = None
+        self.backed_off = False
+        # 距上次减半的失败次数，以及再次减半需要的失败次数
+        self.window_failures = 0
+        self.failure_window = 0
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def release(self, success, latency):
+        with self.condition:
+            self.in_flight -= 1
+            if success:
+                self.successes += 1
+                self.window_count += 1
+                self.window_latency += latency
+                if self.window_count >= self.limit:
+                    self._end_window()
+            else:
+                self.failures += 1
+                self.window_failures += 1
+                if not self.backed_off or self.window_failures >= self.failure_window:
+                    self.failure_window = self.limit
+                    self.window_failures = 0
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self.backed_off = True
+                    logging.debug(f"下载出错，并发降至 {self.limit}")
+            self.condition.notify_all()
+
+    def _end_window(self):
+        now = time.monotonic()
+        throughput = self.window_count / max(now - self.window_start, 1e-6)
+        latency = self.window_latency / self.window_count
+        if self.base_latency is None:
+            self.base_latency = latency
+        else:
+            # 基线延迟缓慢跟随，适应网络状况的变化
+            self.base_latency = min(latency, self.base_latency * 0.9 + latency * 0.1)
+        if not self.backed_off and throughput >= self.last_throughput and latency <= self.base_latency * LATENCY_TOLERANCE:
+            self.limit = min(self.max_limit, self.limit + 1)
+        self.last_throughput = throughput
+        self.window_start = now
+        self.window_count = 0
+        self.window_latency = 0.0
+        self.backed_off = False
+        self.window_failures = 0
+
+    def get(self, url, retries=5, timeout=10, **kwargs):
+        """在并发控制下发送GET请求，失败时按抖动指数退避重试
+
+        Returns:
+            requests.Response: 最后一次的响应，404等不可重试的响应直接返回；全部失败时返回None
+        """
+        for attempt in range(retries):
+            self.acquire()
+            start = time.monotonic()
+            resp = None
+            retryable = True
+            try:
+                resp = requests.get(url, timeout=timeout, **kwargs)
+                retryable = resp.status_code == 429 or resp.status_code >= 500
+            except requests.exceptions.RequestException:
+                pass
+            finally:
+                # 其他异常同样归还并发名额并记为失败，否则名额泄漏后所有下载最终都会卡住
+                self.release(not retryable, time.monotonic() - start)
+            if not retryable:
+                return resp
+            if attempt < retries - 1:
+                delay = backoff_delay(attempt)
+                retry_after = resp.headers.get("Retry-After") if resp is not None else None
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                time.sleep(delay)
+        return None
+
+    def stats(self):
+        with self.condition:
+            return {
+                "limit": self.limit,
+                "inFlight": self.in_flight,
+                "peak": self.peak,
+                "successes": self.successes,
+                "failures": self.failures,
+                "throughput": round(self.last_throughput, 1)
+            }
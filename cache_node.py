@@ -0,0 +1,240 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, jsonify, send_from_directory, abort
+from werkzeug.serving import make_server
+import fast_json
+
+# 局域网缓存节点地址，例如 http://192.168.1.10:18082，设置后从该节点同步资源
+CACHE_NODE_URL = os.environ.get("LOL_SKIN_CACHE_NODE")
+# 设置后本机作为缓存节点对外提供资源
+CACHE_NODE_PORT = int(os.environ.get("LOL_SKIN_CACHE_PORT", "0") or 0)
+# 节点共享的资源，目录会递归列出
+SHARED_ROOTS = ("skins", "id_skins", "skins.json", "champion.json")
+MANIFEST_CACHE_PATH = "cache_manifest.json"
+# 服务端清单的最短刷新间隔(秒)
+MANIFEST_TTL = 60
+MAX_WORKERS = 8
+TIMEOUT = 30
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha1(path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def is_shared_path(rel, root=None):
+    """节点清单中的相对路径是否属于共享资源，拒绝绝对路径和 .. 越出目录的条目"""
+    if not isinstance(rel, str) or not rel or "\\" in rel or rel.startswith("/"):
+        return False
+    parts = rel.split("/")
+    if any(part in ("", ".", "..") for part in parts) or ":" in parts[0]:
+        return False
+    roots = (root,) if root else SHARED_ROOTS
+    return any(rel == r or rel.startswith(r + "/") for r in roots if r in SHARED_ROOTS)
+
+
+class FileManifest:
+    """共享资源的文件清单 {相对路径: {"size", "sha1"}}
+
+    哈希按 (mtime, size) 缓存到本地，只有修改过的文件会重新计算。
+    """
+
+    def __init__(self, base_dir=None, cache_path=MANIFEST_CACHE_PATH):
+        self.base_dir = base_dir or os.getcwd()
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.hashes = self.load_cache()
+        self.built = {}
+
+    def load_cache(self):
+        try:
+            return fast_json.load_file(self.cache_path)
+        except Exception:
+            return {}
+
+    def save_cache(self):
+        try:
+            fast_json.dump_file(self.cache_path, self.hashes, indent=False)
+        except Exception as e:
+            logging.warning(f"保存文件清单缓存失败: {e}")
+
+    def list_files(self, root):
+        path = os.path.join(self.base_dir, root)
+        if os.path.isfile(path):
+            return [root]
+        files = []
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                if filename.endswith((".tmp", ".part")):
+                    continue
+                full = os.path.join(dirpath, filename)
+                files.append(os.path.relpath(full, self.base_dir).replace(os.sep, "/"))
+        return files
+
+    def build(self, root):
+        """计算某个共享资源的清单"""
+        manifest = {}
+        changed = False
+        for rel in self.list_files(root):
+            full = os.path.join(self.base_dir, rel)
+            try:
+                stat = os.stat(full)
+            except OSError:
+                continue
+            cached = self.hashes.get(rel)
+            if not cached or cached["mtime"] != stat.st_mtime or cached["size"] != stat.st_size:
+                cached = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": file_sha1(full)}
+                self.hashes[rel] = cached
+                changed = True
+            manifest[rel] = {"size": cached["size"], "sha1": cached["sha1"]}
+        if changed:
+            self.save_cache()
+        return manifest
+
+    def get(self, root, max_age=MANIFEST_TTL):
+        """获取清单，max_age秒内重复请求复用上次结果"""
+        with self.lock:
+            built = self.built.get(root)
+            if built and time.time() - built[0] < max_age:
+                return built[1]
+            manifest = self.build(root)
+            self.built[root] = (time.time(), manifest)
+            return manifest
+
+
+class CacheNodeServer:
+    """局域网缓存节点，提供清单和支持Range的文件下载"""
+
+    def __init__(self, supervisor, base_dir=None):
+        self.supervisor = supervisor
+        self.base_dir = base_dir or os.getcwd()
+        self.manifest = FileManifest(self.base_dir)
+        self.app = Flask(__name__)
+        self.app.json = fast_json.FastJSONProvider(self.app)
+        self.server = None
+        self.register_routes()
+
+    def register_routes(self):
+        @self.app.route('/manifest/<root>')
+        def get_manifest(root):
+            if root not in SHARED_ROOTS:
+                return jsonify({"error": "Unknown root"}), 404
+            return jsonify(self.manifest.get(root))
+
+        @self.app.route('/files/<path:rel>')
+        def get_file(rel):
+            if rel.split("/", 1)[0] not in SHARED_ROOTS:
+                abort(404)
+            # send_from_directory会处理条件请求和Range请求，并拒绝越出目录的路径
+            return send_from_directory(self.base_dir, rel, conditional=True)
+
+    def start(self, port=CACHE_NODE_PORT):
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('0.0.0.0', port, self.app, threaded=True)
+
+        def run_server(task):
+            self.server.serve_forever(poll_interval=0.1)
+
+        task = self.supervisor.spawn("cache_node", run_server, order=10, on_cancel=self.server.shutdown)
+        # 后台预先计算清单，避免第一个客户端等待
+        self.supervisor.submit(lambda: [self.manifest.get(root) for root in SHARED_ROOTS])
+        logging.info(f"缓存节点已启动，端口 {port}")
+        return task
+
+
+class CacheNodeClient:
+    """从缓存节点增量同步资源，只下载哈希不同的文件"""
+
+    def __init__(self, base_url=CACHE_NODE_URL, base_dir=None):
+        self.base_url = base_url.rstrip("/")
+        self.base_dir = base_dir or os.getcwd()
+        self.local = FileManifest(self.base_dir)
+        self.session = requests.Session()
+
+    def remote_manifest(self, root):
+        resp = self.session.get(f"{self.base_url}/manifest/{root}", timeout=TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+    def local_path(self, rel):
+        """相对路径对应的本地路径，不在base_dir内时抛出ValueError"""
+        base = os.path.abspath(self.base_dir)
+        dest = os.path.abspath(os.path.join(base, *rel.split("/")))
+        if os.path.commonpath([base, dest]) != base or dest == base:
+            raise ValueError(f"路径越出同步目录: {rel}")
+        return dest
+
+    def download(self, rel, expected):
+        """下载单个文件，存在.part时用Range续传"""
+        dest = self.local_path(rel)
+        part = dest + ".part"
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if offset >= expected["size"]:
+            offset = 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self.session.get(f"{self.base_url}/files/{rel}", headers=headers, stream=True, timeout=TIMEOUT) as resp:
+            resp.raise_for_status()
+            mode = "ab" if offset and resp.status_code == 206 else "wb"
+            with open(part, mode) as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+        if file_sha1(part) != expected["sha1"]:
+            os.remove(part)
+            raise ValueError(f"校验失败: {rel}")
+        os.replace(part, dest)
+        stat = os.stat(dest)
+        self.local.hashes[rel] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": expected["sha1"]}
+
+    def sync(self, root, purge=False, max_workers=MAX_WORKERS):
+        """同步一个共享资源，返回 (下载数, 失败数)
+
+        Args:
+            purge: 删除节点上已不存在的本地文件，节点清单为空或有下载失败时不删除
+        """
+        remote = self.remote_manifest(root)
+        # 只接受该共享资源下的路径，恶意或错误的清单不能写到同步目录之外
+        rejected = [rel for rel in remote if not is_shared_path(rel, root)]
+        for rel in rejected:
+            logging.warning(f"忽略缓存节点清单中的非法路径: {rel!r}")
+            del remote[rel]
+        local = self.local.get(root, max_age=0)
+        changed = [rel for rel, entry in remote.items()
+                   if local.get(rel, {}).get("sha1") != entry["sha1"]]
+
+        failed = len(rejected)
+        if changed:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(self.download, rel, remote[rel]): rel for rel in changed}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed += 1
+                        logging.warning(f"从缓存节点下载失败 {futures[future]}: {e}")
+
+        if changed:
+            self.local.save_cache()
+
+        # 节点上缺少该目录时清单为空，此时删除会清空本地资源
+        if purge and remote and not failed:
+            for rel in set(local) - set(remote):
+                try:
+                    os.remove(self.local_path(rel))
+                except (OSError, ValueError):
+                    pass
+        elif purge:
+            logging.warning(f"缓存节点上的 {root} 为空或同步失败，跳过删除本地文件")
+
+        updated = len(changed) - (failed - len(rejected))
+        logging.info(f"从缓存节点同步 {root}: 共 {len(remote)} 个文件, 更新 {updated} 个, 失败 {failed} 个")
+        return updated, failed
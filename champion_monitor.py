@@ -1,14 +1,19 @@
-import time
 import logging
-import threading
+from game_api import LcuUnavailable
 
 class ChampionMonitor:
-    def __init__(self, game_api, web_server, skin_dict):
+    # 英雄选择阶段的轮询间隔，其余阶段暂停
+    POLL_INTERVALS = {"ChampSelect": 0.3}
+
+    def __init__(self, game_api, web_server, skin_dict, scheduler, prefetcher=None):
         self.game_api = game_api  
         self.web_server = web_server  
         self.skin_dict = skin_dict  
+        self.prefetcher = prefetcher
+        self.scheduler = scheduler
         self.running = False
-        self.monitor_thread = None
+        self.browser_opened = False
+        self.last_champion = None
         
         # 特殊英雄名称映射
         self.champion_name_mapping = {
@@ -63,72 +68,82 @@ class ChampionMonitor:
             return
         
         self.running = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
+        self.scheduler.on_enter("ChampSelect", self._on_enter_champ_select)
+        self.scheduler.on_leave("ChampSelect", self._on_leave_champ_select)
+        self.scheduler.register("champion_monitor", self.poll, self.POLL_INTERVALS)
         logging.info("开始监控英雄选择...")
-        return self.monitor_thread
+        return self.scheduler.start()
     
     def stop_monitoring(self):
         """停止监控"""
         self.running = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=2)
-            logging.info("已停止监控英雄选择")
+        self.scheduler.unregister("champion_monitor")
+        if self.prefetcher:
+            self.prefetcher.cancel()
+        logging.info("已停止监控英雄选择")
     
-    def _monitor_loop(self):
-        """监控循环"""
-        browser_opened = False
-        last_champion = None
-        
-        while self.running:
-            try:
-                champion_id = self.game_api.get_current_champion_id()
+    def _on_enter_champ_select(self, old_phase, new_phase):
+        """进入英雄选择时开始预取战绩"""
+        if self.prefetcher:
+            self.prefetcher.start()
+    
+    def _on_leave_champ_select(self, old_phase, new_phase):
+        """离开英雄选择时取消预取并重置英雄记录"""
+        self.last_champion = None
+        if self.prefetcher:
+            self.prefetcher.cancel()
+    
+    def poll(self):
+        """检查一次当前选择的英雄，由调度器按阶段间隔调用"""
+        try:
+            champion_id = self.game_api.get_current_champion_id()
+            
+            if champion_id != 0:
+                champion_alias = self.game_api.get_champion_alias(champion_id)
                 
-                if champion_id != 0:
-                    champion_alias = self.game_api.get_champion_alias(champion_id)
+                # 只有当英雄变化时才更新数据
+                if champion_alias and champion_alias != self.last_champion:
+                    self.last_champion = champion_alias
                     
-                    # 只有当英雄变化时才更新数据
-                    if champion_alias and champion_alias != last_champion:
-                        last_champion = champion_alias
-                        
-                        # 规范化英雄名称
-                        normalized_champion = self.normalize_champion_name(champion_alias)
+                    # 规范化英雄名称
+                    normalized_champion = self.normalize_champion_name(champion_alias)
+                    
+                    # 查找匹配的英雄
+                    found = False
+                    for skin_champion in self.skin_dict:
+                        normalized_skin_champion = self.normalize_champion_name(skin_champion)
                         
-                        # 查找匹配的英雄
-                        found = False
-                        for skin_champion in self.skin_dict:
-                            normalized_skin_champion = self.normalize_champion_name(skin_champion)
+                        if normalized_champion == normalized_skin_champion:
+                            # 过滤掉原皮
+                            available_skins = [
+                                skin for skin in self.skin_dict[skin_champion]
+                                if skin.lower() != champion_alias.lower()
+                            ]
                             
-                            if normalized_champion == normalized_skin_champion:
-                                # 过滤掉原皮
-                                available_skins = [
-                                    skin for skin in self.skin_dict[skin_champion]
-                                    if skin.lower() != champion_alias.lower()
-                                ]
+                            if available_skins:
+                                logging.info(f"找到 {len(available_skins)} 个 {champion_alias} 的皮肤")
+                                logging.debug(f"{champion_alias} 的皮肤: {available_skins}")
                                 
-                                if available_skins:
-                                    logging.info(f"找到 {len(available_skins)} 个 {champion_alias} 的皮肤: {available_skins}")
-                                    
-                                    # 更新Web服务器数据
-                                    self.web_server.update_champion_data(champion_alias, available_skins)
-                                    
-                                    # 只有第一次才打开浏览器
-                                    if not browser_opened:
-                                        self.web_server.open_browser()
-                                        browser_opened = True
-                                    found = True
-                                else:
-                                    logging.warning(f"英雄 {champion_alias} 没有可用皮肤")
-                                break
-                        
-                        if not found:
-                            logging.warning(f"未找到英雄 {champion_alias} 的皮肤")
-                else:
-                    # 如果没有选择英雄，重置上一次英雄记录
-                    last_champion = None
+                                # 更新Web服务器数据
+                                self.web_server.update_champion_data(champion_alias, available_skins)
+                                
+                                # 只有第一次才打开浏览器
+                                if not self.browser_opened:
+                                    self.web_server.open_browser()
+                                    self.browser_opened = True
+                                found = True
+                            else:
+                                logging.warning(f"英雄 {champion_alias} 没有可用皮肤")
+                            break
                     
-            except Exception as e:
-                logging.error(f"监控过程中发生错误: {e}")
-            
-            time.sleep(0.3)
\ No newline at end of file
+                    if not found:
+                        logging.warning(f"未找到英雄 {champion_alias} 的皮肤")
+            else:
+                # 如果没有选择英雄，重置上一次英雄记录
+                self.last_champion = None
+                
+        except LcuUnavailable as e:
+            # 连接问题由熔断器和阶段调度器统一记录，这里不再重复刷屏
+            logging.debug(f"LCU暂不可用: {e}")
+        except Exception as e:
+            logging.error(f"监控过程中发生错误: {e}")
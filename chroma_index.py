@@ -0,0 +1,113 @@
+import os
+import re
+import logging
+import threading
+
+# 炫彩预览图支持的扩展名
+PREVIEW_EXTENSIONS = (".png", ".jpg", ".jpeg")
+CHROMA_ID_PATTERN = re.compile(r"(\d+)$")
+
+
+class ChromaIndex:
+    """炫彩索引
+
+    skins/<英雄>/chromas/<皮肤>/ 下的zip按英雄惰性索引，首次选择该英雄时才扫描，
+    启动时间和内存不随炫彩数量增长。
+    """
+
+    def __init__(self, skins_path=None):
+        self.skins_path = skins_path or os.path.join(os.getcwd(), "skins")
+        self.lock = threading.Lock()
+        self.champion_dirs = None
+        self.index = {}
+
+    @staticmethod
+    def normalize(name):
+        """规范化英雄名称，与英雄监控的比较规则一致"""
+        if not name:
+            return None
+        if name == "Nunu & Willump":
+            return "nunu"
+        return ''.join(c.lower() for c in name if c.isalnum())
+
+    def _champion_dir(self, champion):
+        """根据英雄名称找到skins下的目录名"""
+        if self.champion_dirs is None:
+            dirs = {}
+            if os.path.exists(self.skins_path):
+                for entry in os.listdir(self.skins_path):
+                    if os.path.isdir(os.path.join(self.skins_path, entry)):
+                        dirs[self.normalize(entry)] = entry
+            self.champion_dirs = dirs
+        return self.champion_dirs.get(self.normalize(champion))
+
+    def _scan(self, champion_dir):
+        """扫描一个英雄的炫彩目录"""
+        chromas_path = os.path.join(self.skins_path, champion_dir, "chromas")
+        result = {}
+        if not os.path.isdir(chromas_path):
+            return result
+        for skin in os.listdir(chromas_path):
+            skin_path = os.path.join(chromas_path, skin)
+            if not os.path.isdir(skin_path):
+                continue
+            files = os.listdir(skin_path)
+            previews = {
+                os.path.splitext(f)[0]: os.path.join(skin_path, f)
+                for f in files if f.lower().endswith(PREVIEW_EXTENSIONS)
+            }
+            chromas = []
+            for f in sorted(files):
+                if not f.endswith(".zip"):
+                    continue
+                name = f[:-4]
+                match = CHROMA_ID_PATTERN.search(name)
+                chromas.append({
+                    "id": match.group(1) if match else name,
+                    "name": name,
+                    "path": os.path.join(skin_path, f),
+                    "preview": previews.get(name)
+                })
+            if chromas:
+                result[skin] = chromas
+        return result
+
+    def get(self, champion):
+        """获取英雄的炫彩索引，首次访问时扫描
+
+        Returns:
+            dict: {皮肤名: [{"id", "name", "path", "preview"}, ...]}
+        """
+        key = self.normalize(champion)
+        if not key:
+            return {}
+        with self.lock:
+            if key not in self.index:
+                champion_dir = self._champion_dir(champion)
+                self.index[key] = self._scan(champion_dir) if champion_dir else {}
+                total = sum(len(c) for c in self.index[key].values())
+                logging.info(f"已索引 {champion} 的炫彩: {len(self.index[key])} 个皮肤, {total} 个炫彩")
+            return self.index[key]
+
+    def find(self, champion, skin_name, chroma_id):
+        """查找指定炫彩"""
+        for chroma in self.get(champion).get(skin_name, []):
+            if str(chroma["id"]) == str(chroma_id):
+                return chroma
+        return None
+
+    def summary(self, champion):
+        """给前端使用的炫彩列表，不包含本地路径"""
+        return {
+            skin: [
+                {"id": c["id"], "name": c["name"], "hasPreview": bool(c["preview"])}
+                for c in chromas
+            ]
+            for skin, chromas in self.get(champion).items()
+        }
+
+    def invalidate(self):
+        """皮肤目录同步后清空索引"""
+        with self.lock:
+            self.champion_dirs = None
+            self.index.clear()
@@ -0,0 +1,58 @@
+import time
+import logging
+import threading
+
+
+class CircuitBreaker:
+    """熔断器
+
+    连续失败达到阈值后熔断，熔断期间调用直接失败；
+    熔断时间按指数退避增长，到期后放行一次试探调用，成功则恢复。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, failure_threshold=3, base_delay=1, max_delay=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0
+
+    def allow(self):
+        """是否允许本次调用"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() >= self.open_until:
+                # 到期后只放行一次试探
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logging.info(f"{self.name} 已恢复")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trips = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                delay = min(self.base_delay * (2 ** self.trips), self.max_delay)
+                self.trips += 1
+                self.state = self.OPEN
+                self.open_until = time.monotonic() + delay
+                logging.warning(f"{self.name} 连续失败 {self.failures} 次，熔断 {delay} 秒")
+
+    def reset(self):
+        self.record_success()
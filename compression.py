@@ -0,0 +1,103 @@
+import gzip
+import logging
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小于该大小的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+# 压缩都在请求路径上进行，用较低的压缩级别，brotli q11 每次要几十毫秒
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/css", "application/javascript", "text/plain")
+
+
+def parse_accept_encoding(accept_encoding):
+    """解析Accept-Encoding，返回 {编码: q值}，q值缺省为1，格式错误的q值按0处理"""
+    weights = {}
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate(accept_encoding):
+    """根据Accept-Encoding选择压缩算法，q值最高的优先，同等时优先br，q=0的编码不使用"""
+    weights = parse_accept_encoding(accept_encoding)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    return data
+
+
+class PrecompressedAsset:
+    """预先压缩好各种编码的内容"""
+
+    def __init__(self, data, mimetype):
+        self.mimetype = mimetype
+        self.variants = {None: data, "gzip": compress(data, "gzip")}
+        if brotli is not None:
+            self.variants["br"] = compress(data, "br")
+
+    def response(self, response_class):
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        response = response_class(self.variants[encoding], mimetype=self.mimetype)
+        response.direct_passthrough = True
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+def install_compression(app):
+    """为JSON和HTML响应按Accept-Encoding自动压缩"""
+
+    @app.after_request
+    def compress_response(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if "Content-Encoding" in response.headers or response.status_code < 200 or response.status_code >= 300:
+            return response
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        if not encoding:
+            return response
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        try:
+            response.set_data(compress(data, encoding))
+        except Exception as e:
+            logging.debug(f"压缩响应失败: {e}")
+            return response
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
+
+    return compress_response
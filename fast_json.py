@@ -0,0 +1,61 @@
+import os
+import json
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """解析json，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=False):
+    """序列化为bytes，不转义非ASCII字符"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def load_file(path):
+    """读取json文件"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(path, obj, indent=True):
+    """写入json文件，先写临时文件再替换，中断时不会留下半个文件"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps(obj, indent=indent))
+    os.replace(tmp_path, path)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask的json序列化实现，jsonify走orjson
+
+    调用方传入indent、sort_keys等参数时改用标准库，保证参数生效。
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault("ensure_ascii", False)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -1,39 +1,51 @@
-import json
 import logging
 import requests
-import subprocess
-import psutil
 import os
-import time
+import threading
+from lcu_discovery import LcuDiscovery
+from circuit_breaker import CircuitBreaker
+from single_flight import SingleFlight
+from lcu_governor import RequestGovernor, PRIORITY_CRITICAL, PRIORITY_NORMAL
+import fast_json
+
+# LCU请求超时(秒)
+REQUEST_TIMEOUT = 10
+
+
+class LcuUnavailable(Exception):
+    """LCU无法连接或处于熔断状态"""
+
 
 class GameAPI:
-    def __init__(self):
+    def __init__(self, credentials=None):
+        """
+        Args:
+            credentials: 指定要连接的客户端，多开时每个客户端一个实例；为None时自动发现
+        """
         self.url = None
         self.summoner_id = None
+        self.credentials = credentials
+        self.pinned = credentials is not None
+        self.discovery = LcuDiscovery()
+        # 限制对客户端的请求速率和并发，避免战绩抓取拖慢客户端
+        self.governor = RequestGovernor()
+        # 相同的GET请求同时进行时只发一次
+        self.flight = SingleFlight()
+        self.breaker = CircuitBreaker("LCU连接")
+        self.reconnect_lock = threading.RLock()
+        self.reconnect_listeners = []
+        self.champion_aliases = None
         self.initialize()
     
     def initialize(self):
         """初始化游戏API连接"""
 
-        target_name = "LeagueClientUx.exe"
-        cmdline = None
-
-        for i in range(5):
-            for proc in psutil.process_iter(['name', 'cmdline']):
-                if proc.info['name'] == target_name:
-                    cmdline = " ".join(proc.info['cmdline'])
-            if(cmdline != None):
-                break
-            else:
-                logging.info("未找到LeagueClientUx.exe，正在重试...")
-                time.sleep(2)
-
-        app_port = cmdline.split('--app-port=')[-1].split(' ')[0].strip('\"') 
-        auth_token = cmdline.split('--remoting-auth-token=')[-1].split(' ')[0].strip('\"') 
-        self.url = "https" + '://' + 'riot:' + auth_token + '@' + "127.0.0.1" + ':' + app_port
-        logging.info(f"API: {self.url}")
-        if(auth_token == ""):
+        credentials = self.credentials or self.discovery.discover()
+        if credentials is None or not credentials.token:
             exit("请先启动lol")
+        self.credentials = credentials
+        self.url = credentials.url
+        logging.info(f"API: {self.url}")
         # 获取召唤师ID
         self.get_summoner_id()
         
@@ -41,35 +53,108 @@ class GameAPI:
         if not os.path.exists("champion.json"):
             self.create_champion_json()
     
-    def get_summoner_id(self):
+    def on_reconnect(self, callback):
+        """注册重连回调，客户端重启后连接切换时调用"""
+        self.reconnect_listeners.append(callback)
+    
+    def reconnect(self):
+        """重新发现客户端的端口和token，连接信息变化时原子切换"""
+        with self.reconnect_lock:
+            # 优先重新读取同一个客户端目录的lockfile，多开时不会切换到其他客户端
+            credentials = self.discovery.read_lockfile(self.credentials.install_dir) if self.credentials else None
+            if credentials is None and not self.pinned:
+                credentials = self.discovery.discover(retries=1)
+            if credentials is None or credentials.url == self.url:
+                return False
+            self.credentials = credentials
+            self.url = credentials.url
+            self.breaker.reset()
+            logging.info(f"检测到客户端重启，已切换到新的连接: {self.url}")
+            try:
+                # 不经过get的请求合并，本次重连可能正是由同一个current-summoner请求触发的
+                self.get_summoner_id(retry=False)
+            except Exception as e:
+                logging.error(f"重连后获取召唤师ID失败: {e}")
+            for callback in self.reconnect_listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"重连回调执行出错: {e}")
+            return True
+    
+    def request(self, method, path, retry=True, priority=PRIORITY_NORMAL, **kwargs):
+        """发送LCU请求
+
+        请求先经过调度器排队，按优先级和速率限制发出；
+        连接失败或鉴权失败时自动重新发现连接信息并重试一次；
+        连续失败后熔断，熔断期间直接抛出 LcuUnavailable，不再访问网络。
+        """
+        if not self.breaker.allow():
+            raise LcuUnavailable("LCU连接熔断中")
+        try:
+            with self.governor.slot(priority):
+                res = requests.request(method, self.url + path, verify=False, timeout=REQUEST_TIMEOUT, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            if retry and self.reconnect():
+                return self.request(method, path, retry=False, priority=priority, **kwargs)
+            raise LcuUnavailable(str(e))
+        except BaseException:
+            # 其他异常同样记为失败，否则半开状态下的试探没有结果，熔断器永远不再放行
+            self.breaker.record_failure()
+            raise
+        if res.status_code in (401, 403):
+            self.breaker.record_failure()
+            if retry and self.reconnect():
+                return self.request(method, path, retry=False, priority=priority, **kwargs)
+            return res
+        self.breaker.record_success()
+        return res
+    
+    def get(self, path, **kwargs):
+        key = (path, repr(sorted(kwargs.items())))
+        return self.flight.do(key, lambda: self.request("GET", path, **kwargs))
+    
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+    
+    def get_summoner_id(self, retry=True):
         """获取当前召唤师ID"""
-        res = requests.get(url=self.url + "/lol-summoner/v1/current-summoner", verify=False)
+        res = self.request("GET", "/lol-summoner/v1/current-summoner", retry=retry, priority=PRIORITY_CRITICAL)
         self.summoner_id = str(res.json()['summonerId'])
         logging.info("已获取召唤师ID")
         return self.summoner_id
     
     def get_current_champion_id(self):
         """获取当前选择的英雄ID"""
-        res = requests.get(url=self.url + "/lol-champ-select/v1/current-champion", verify=False)
+        res = self.get("/lol-champ-select/v1/current-champion", priority=PRIORITY_CRITICAL)
+        return res.json()
+    
+    def get_gameflow_phase(self):
+        """获取当前游戏流程阶段，如 None、Lobby、ChampSelect、InProgress"""
+        res = self.get("/lol-gameflow/v1/gameflow-phase", priority=PRIORITY_CRITICAL)
+        if res.status_code != 200:
+            return "None"
         return res.json()
     
     def get_champion_alias(self, champion_id):
         """根据英雄ID获取英雄别名"""
-        with open("champion.json", "r", encoding="utf-8") as f:
-            champions = json.load(f)
-        
-        for champion in champions:
-            if champion["id"] == champion_id:
-                return champion["alias"]
-        
-        return None
+        return self.load_champion_aliases().get(champion_id)
+    
+    def load_champion_aliases(self):
+        """读取champion.json的 {id: alias} 映射，文件未修改时复用"""
+        try:
+            mtime = os.path.getmtime("champion.json")
+        except OSError:
+            return {}
+        if self.champion_aliases is None or self.champion_aliases[0] != mtime:
+            champions = fast_json.load_file("champion.json")
+            self.champion_aliases = (mtime, {champion["id"]: champion["alias"] for champion in champions})
+        return self.champion_aliases[1]
     
     def create_champion_json(self):
         """创建champion.json文件"""
-        res = requests.get(
-            url=self.url + f"/lol-champions/v1/inventories/{self.summoner_id}/champions-minimal", 
-            verify=False
-        )
+        res = self.get(f"/lol-champions/v1/inventories/{self.summoner_id}/champions-minimal")
         
         champions = []
         for champion in res.json():
@@ -79,7 +164,7 @@ class GameAPI:
                 "alias": champion["alias"]
             })
         
-        with open("champion.json", "w", encoding="utf-8") as f:
-            json.dump(champions, f, ensure_ascii=False, indent=2)
+        fast_json.dump_file("champion.json", champions)
+        self.champion_aliases = None
         
         logging.info("已创建champion.json文件")
\ No newline at end of file
@@ -1,75 +1,91 @@
-import requests
 import logging
 import json
 import traceback
 from datetime import datetime, timedelta
-import urllib.parse
+from stats_engine import StatsEngine
+from summoner_resolver import SummonerResolver
+from session_tracker import SessionTracker
+from match_store import MatchStore
+from lcu_governor import PRIORITY_BACKGROUND
+
+# 模式与队列ID映射
+QUEUE_MAP = {
+    'SOLO_DUO': 420,
+    'FLEX': 440,
+}
+# 比赛列表每页数量
+MATCH_PAGE_SIZE = 20
+# 比赛列表最多翻到的下标
+MATCH_MAX_INDEX = 200
 
 class GameStats:
-    def __init__(self, game_api):
+    def __init__(self, game_api, match_store=None, supervisor=None):
         """初始化游戏统计类
         
         Args:
             game_api: GameAPI实例，用于获取LCU API的基础URL
+            match_store: 对局详情缓存，多个客户端会话共享同一个实例
+            supervisor: 任务管理器，并发请求提交到其共享线程池，为None时顺序执行
         """
         self.game_api = game_api
-        self.url = game_api.url
-        self.summoner_id = game_api.summoner_id
+        self.supervisor = supervisor
+        self.match_store = match_store or MatchStore()
+        self.resolver = SummonerResolver(game_api)
+        self.tracker = SessionTracker()
+        # 客户端重启后旧会话的缓存全部作废
+        game_api.on_reconnect(self.on_reconnect)
+    
+    @property
+    def summoner_id(self):
+        return self.game_api.summoner_id
+    
+    def on_reconnect(self):
+        """连接切换后清空身份和会话缓存"""
+        self.resolver.clear()
+        self.tracker.reset()
+    
+    def invalidate_match_cache(self, *args):
+        """清空会话内缓存的战绩，对局结束后调用"""
+        self.tracker.reset()
+        logging.info("已清空战绩缓存")
     
     def get_current_game_players(self):
         """获取当前游戏中的所有玩家信息"""
         try:
-            # 首先检查是否在游戏中
-            session_response = requests.get(
-                f"{self.url}/lol-gameflow/v1/session",
-                verify=False
-            )
-            
-            
-            if session_response.status_code != 200:
-                logging.debug("当前不在游戏中")
-                return None
-            
-            # 获取当前游戏会话信息
-            response = requests.get(
-                f"{self.url}/lol-champ-select/v1/session",
-                verify=False
-            )
-            
+            # 获取当前英雄选择会话信息，不在英雄选择中时接口返回非200
+            response = self.game_api.get("/lol-champ-select/v1/session")
             
             if response.status_code != 200:
-                logging.error(f"获取当前游戏玩家信息失败: {response.status_code}")
+                logging.debug("当前不在英雄选择中")
+                self.tracker.update(None)
                 return None
             
-            data = response.json()
-            players = []
+            diff = self.tracker.update(response.json())
+            members = self.tracker.get_members()
             
-            # 获取所有玩家信息
-            for member in data.get("myTeam", []):
-                player = {
-                    "summonerId": member.get("summonerId"),
-                    "puuid": member.get("puuid"),
-                    "summonerName": member.get("summonerName"),
-                    "championId": member.get("championId"),
-                    "position": member.get("assignedPosition", "未知")
-                }
-                if player.get("puuid"):
-                    summoner_info = self.get_summoner_by_puuid(player["puuid"])
-                    if summoner_info and summoner_info.get("displayName"):
-                        player["summonerName"] = summoner_info["displayName"]
-                    elif summoner_info and summoner_info.get("gameName") and summoner_info.get("tagLine"):
-                         player["summonerName"] = f"{summoner_info['gameName']}#{summoner_info['tagLine']}"
-                    elif player.get("summonerId") and player["summonerId"] != 0:
-                         summoner_info_by_id = self.get_summoner_by_id(player["summonerId"])
-                         if summoner_info_by_id and summoner_info_by_id.get("displayName"):
-                             player["summonerName"] = summoner_info_by_id["displayName"]
-                         elif summoner_info_by_id and summoner_info_by_id.get("gameName") and summoner_info_by_id.get("tagLine"):
-                             player["summonerName"] = f"{summoner_info_by_id['gameName']}#{summoner_info_by_id['tagLine']}"
-
-                players.append(player)
-                logging.debug(f"添加玩家信息: {player}")
+            # 只解析新加入成员的身份，其余直接复用
+            pending = [(key, snapshot) for key, snapshot in members if self.tracker.get_player(key) is None]
+            if pending:
+                summoner_infos = self.resolver.resolve_members([snapshot for _, snapshot in pending])
+                for (key, snapshot), summoner_info in zip(pending, summoner_infos):
+                    player = {
+                        "summonerId": snapshot.get("summonerId"),
+                        "puuid": snapshot.get("puuid"),
+                        "summonerName": snapshot.get("summonerName"),
+                        "championId": snapshot.get("championId"),
+                        "position": snapshot.get("position")
+                    }
+                    name = self.resolver.display_name(summoner_info)
+                    if not name and player.get("summonerId") and player["summonerId"] != 0:
+                        name = self.resolver.display_name(self.resolver.get_by_id(player["summonerId"]))
+                    if name:
+                        player["summonerName"] = name
+                    self.tracker.set_player(key, player)
+                    logging.debug(f"添加玩家信息: {player}")
             
-            logging.info(f"成功获取 {len(players)} 个玩家信息")
+            players = [dict(self.tracker.get_player(key)) for key, _ in members if self.tracker.get_player(key)]
+            if not diff.is_empty:
+                logging.info(f"成功获取 {len(players)} 个玩家信息")
             return players
             
         except Exception as e:
@@ -82,49 +98,13 @@ class GameStats:
         """获取玩家最近的比赛记录，支持按模式过滤"""
         try:
             # 首先获取召唤师的puuid
-            summoner_response = requests.get(
-                f"{self.url}/lol-summoner/v1/summoners/{summoner_id}",
-                verify=False
-            )
-            if summoner_response.status_code != 200:
-                logging.error(f"获取召唤师信息失败: {summoner_response.status_code}")
-                return []
-            summoner_data = summoner_response.json()
-            puuid = summoner_data.get("puuid")
+            puuid = self.resolver.get_puuid(summoner_id)
             if not puuid:
                 logging.error(f"无法获取召唤师PUUID")
                 return []
-            # 使用puuid获取比赛历史
-            matchlist_response = requests.get(
-                f"{self.url}/lol-match-history/v1/products/lol/{puuid}/matches?begIndex=0&endIndex=29",
-                verify=False
-            )
-            if matchlist_response.status_code != 200:
-                logging.error(f"获取比赛列表失败: {matchlist_response.status_code}")
-                return []
-            matchlist_data = matchlist_response.json()
-            if not matchlist_data or "games" not in matchlist_data:
-                logging.error("比赛历史数据格式错误")
-                return []
-            # 模式映射
-            queue_map = {
-                'SOLO_DUO': 420,
-                'FLEX': 440,
-                'ARAM': 450,
-                'URF': 900,
-                'PRACTICETOOL': 1700
-            }
-            # 过滤并处理游戏列表
+            # 按页惰性获取，只处理符合模式的对局
             matches = []
-            for game in matchlist_data["games"]["games"]:
-                # 按模式过滤
-                if mode and mode != 'ALL':
-                    if mode in ['SOLO_DUO', 'FLEX']:
-                        if game.get("queueId") != queue_map[mode]:
-                            continue
-                    else:
-                        if game.get("gameMode") != mode:
-                            continue
+            for game in self.iter_match_history(puuid, mode=mode):
                 try:
                     participant = game["participants"][0]
                     stats = participant.get("stats", {})
@@ -156,20 +136,71 @@ class GameStats:
                 except (KeyError, IndexError) as e:
                     logging.error(f"处理比赛数据时出错: {e}")
                     continue
-            # 只取最新count场
-            matches = matches[:count]
+                if len(matches) >= count:
+                    break
             return matches
         except Exception as e:
             logging.error(f"获取比赛历史失败: {e}")
             logging.error(f"错误堆栈: {traceback.format_exc()}")
             return []
     
+    def get_cached_match_history(self, summoner_id, count=10, mode=None):
+        """获取房间成员的比赛记录，成员未变化时复用上一次结果"""
+        return self.tracker.get_history(
+            summoner_id, mode, count,
+            lambda: self.get_player_match_history(summoner_id, count=count, mode=mode)
+        )
+
+    def match_mode(self, game, mode):
+        """判断对局是否属于指定模式"""
+        if not mode or mode == 'ALL':
+            return True
+        if mode in QUEUE_MAP:
+            return game.get("queueId") == QUEUE_MAP[mode]
+        return game.get("gameMode") == mode
+
+    def iter_match_history(self, puuid, mode=None, page_size=MATCH_PAGE_SIZE, max_index=MATCH_MAX_INDEX):
+        """按页惰性遍历玩家的比赛列表，只产出符合模式的原始对局
+
+        调用方停止迭代后不会再请求后续页面
+
+        Args:
+            puuid: 玩家puuid
+            mode: 模式过滤，None或'ALL'表示不过滤
+            page_size: 每页请求的对局数量
+            max_index: 最多向前翻到的对局下标，避免无限翻页
+        """
+        beg_index = 0
+        while beg_index < max_index:
+            end_index = min(beg_index + page_size, max_index) - 1
+            matchlist_response = self.game_api.get(
+                f"/lol-match-history/v1/products/lol/{puuid}/matches?begIndex={beg_index}&endIndex={end_index}",
+                priority=PRIORITY_BACKGROUND
+            )
+            if matchlist_response.status_code != 200:
+                logging.error(f"获取比赛列表失败: {matchlist_response.status_code}")
+                return
+            matchlist_data = matchlist_response.json()
+            if not matchlist_data or "games" not in matchlist_data:
+                logging.error("比赛历史数据格式错误")
+                return
+            games = matchlist_data["games"].get("games", [])
+            for game in games:
+                if self.match_mode(game, mode):
+                    yield game
+            # 返回数量不足一页说明已经到底
+            if len(games) < end_index - beg_index + 1:
+                return
+            beg_index = end_index + 1
+
     def get_teammates_stats(self, mode=None):
         """获取当前游戏中所有队友的最近战绩，支持模式过滤"""
         try:
+            # 先同步英雄选择会话，新房间会重置战绩缓存
+            players = self.get_current_game_players()
             # 首先尝试获取自己的战绩
             if self.summoner_id:
-                match_history = self.get_player_match_history(self.summoner_id, mode=mode)
+                match_history = self.get_cached_match_history(self.summoner_id, mode=mode)
                 if match_history:
                     my_stats = [{
                         "summonerName": "我的战绩",
@@ -177,8 +208,6 @@ class GameStats:
                         "position": None,
                         "matchHistory": match_history
                     }]
-            # 尝试获取当前游戏玩家信息
-            players = self.get_current_game_players()
             if not players:
                 return my_stats if 'my_stats' in locals() else None
             teammates_stats = []
@@ -187,7 +216,7 @@ class GameStats:
                 summoner_id = player.get("summonerId")
                 if summoner_id and summoner_id != self.summoner_id:
                     has_teammates = True
-                    match_history = self.get_player_match_history(summoner_id, mode=mode)
+                    match_history = self.get_cached_match_history(summoner_id, mode=mode)
                     if match_history:
                         teammates_stats.append({
                             "summonerName": player.get("summonerName"),
@@ -204,6 +233,43 @@ class GameStats:
                 return my_stats
             return None
     
+    def get_players_aggregate(self, summoner_ids=None, count=20, mode=None, with_detail=False):
+        """获取多个玩家最近count场的聚合战绩
+
+        Args:
+            summoner_ids: 召唤师ID列表，为空时使用自己和当前队友
+            count: 每个玩家统计的场次
+            mode: 模式过滤
+            with_detail: 是否拉取对局详情以计算伤害占比和经济占比
+        """
+        try:
+            if not summoner_ids:
+                summoner_ids = [self.summoner_id] if self.summoner_id else []
+                for player in self.get_current_game_players() or []:
+                    summoner_id = player.get("summonerId")
+                    if summoner_id and str(summoner_id) not in map(str, summoner_ids):
+                        summoner_ids.append(summoner_id)
+            records_by_player = {}
+            for summoner_id in summoner_ids:
+                records_by_player[str(summoner_id)] = self.get_cached_match_history(summoner_id, count=count, mode=mode)
+            details = {}
+            if with_detail:
+                game_ids = {r["gameId"] for records in records_by_player.values() for r in records if r.get("gameId")}
+                # 提交到共享线程池，线程数量不随请求增长
+                if self.supervisor:
+                    futures = [(game_id, self.supervisor.submit(self.get_match_detail, game_id)) for game_id in game_ids]
+                    results = [(game_id, future.result()) for game_id, future in futures]
+                else:
+                    results = [(game_id, self.get_match_detail(game_id)) for game_id in game_ids]
+                for game_id, detail in results:
+                    if detail:
+                        details[game_id] = detail
+            return StatsEngine(records_by_player, details).aggregate()
+        except Exception as e:
+            logging.error(f"聚合玩家战绩时出错: {e}")
+            logging.error(f"错误堆栈: {traceback.format_exc()}")
+            return None
+
     def get_match_history_by_summoner_name_and_mode(self, summoner_name, count=10, mode=None):
         """根据召唤师名字和模式获取玩家最近的比赛记录"""
         try:
@@ -224,14 +290,14 @@ class GameStats:
     def get_match_detail(self, game_id):
         """获取指定对局的详细信息，包括所有参与者的英雄、装备等"""
         try:
-            response = requests.get(
-                f"{self.url}/lol-match-history/v1/games/{game_id}",
-                verify=False
-            )
-            if response.status_code != 200:
-                logging.error(f"获取对局详情失败: {response.status_code}")
-                return None
-            data = response.json()
+            data = self.match_store.get(game_id)
+            if data is None:
+                response = self.game_api.get(f"/lol-match-history/v1/games/{game_id}", priority=PRIORITY_BACKGROUND)
+                if response.status_code != 200:
+                    logging.error(f"获取对局详情失败: {response.status_code}")
+                    return None
+                data = response.json()
+                self.match_store.put(game_id, data)
             # 构建 participantId -> summonerId 和 participantId -> gameName 映射
             id_to_summoner_id = {}
             id_to_name = {}
@@ -314,48 +380,11 @@ class GameStats:
 
     def get_summoner_by_puuid(self, puuid):
         """根据玩家puuid获取召唤师信息"""
-        try:
-            # 检查PUUID格式是否有效，防止Invalid URI Format错误
-            if not puuid or '-' not in puuid or len(puuid) < 30:
-                logging.warning(f"无效的PUUID格式: {puuid}")
-                return None
-            
-            # 对PUUID进行URL编码，防止特殊字符导致的错误
-            encoded_puuid = urllib.parse.quote(puuid)
-            
-            response = requests.get(
-                f"{self.url}/lol-summoner/v1/summoners/by-puuid/{encoded_puuid}",
-                verify=False
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logging.error(f"根据puuid获取召唤师信息失败: {response.status_code} - {response.text}")
-                return None
-        except Exception as e:
-            logging.error(f"根据puuid获取召唤师信息时出错: {e}")
-            import traceback
-            logging.error(f"错误堆栈: {traceback.format_exc()}")
-            return None
+        return self.resolver.get_by_puuid(puuid)
 
     def get_summoner_by_id(self, summoner_id):
         """根据玩家summonerId获取召唤师信息"""
         # 注意：这个方法可能在某些模式下（如训练模式）summonerId为0时不可用
         if summoner_id == 0:
              return None
-        try:
-            response = requests.get(
-                f"{self.url}/lol-summoner/v1/summoners/{summoner_id}",
-                verify=False
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                # 记录错误，但可能在预期之内（如summonerId为0）
-                logging.debug(f"根据summonerId获取召唤师信息失败: {response.status_code} - {response.text}")
-                return None
-        except Exception as e:
-            logging.error(f"根据summonerId获取召唤师信息时出错: {e}")
-            import traceback
-            logging.error(f"错误堆栈: {traceback.format_exc()}")
-            return None 
\ No newline at end of file
+        return self.resolver.get_by_id(summoner_id)
@@ -0,0 +1,219 @@
+import os
+import time
+import logging
+import threading
+from lcu_governor import PRIORITY_BACKGROUND
+import fast_json
+
+HISTORY_DIR = "match_history"
+# 每个玩家最多抓取的对局数量
+CRAWL_MAX_GAMES = 1000
+CRAWL_PAGE_SIZE = 20
+# 同时抓取对局详情的数量
+CRAWL_DETAIL_WORKERS = 2
+
+
+class HistoryStore:
+    """本地对局存储
+
+    match_history/games/<gameId>.json 保存对局详情原文，
+    match_history/<puuid>.json 保存该玩家的对局id列表和抓取进度。
+    """
+
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        self.games_dir = os.path.join(path, "games")
+        self.lock = threading.Lock()
+        os.makedirs(self.games_dir, exist_ok=True)
+
+    def game_path(self, game_id):
+        return os.path.join(self.games_dir, f"{game_id}.json")
+
+    def has_game(self, game_id):
+        return os.path.exists(self.game_path(game_id))
+
+    def load_game(self, game_id):
+        try:
+            return fast_json.load_file(self.game_path(game_id))
+        except Exception:
+            return None
+
+    def save_game(self, game_id, detail):
+        fast_json.dump_file(self.game_path(game_id), detail, indent=False)
+
+    def load_progress(self, puuid):
+        """抓取进度
+
+        Returns:
+            dict: games 已收录的对局id(新到旧)，cursor 回溯抓取的下一个下标，complete 是否已抓到最早的对局
+        """
+        try:
+            return fast_json.load_file(os.path.join(self.path, f"{puuid}.json"))
+        except Exception:
+            return {"games": [], "cursor": 0, "complete": False, "updated": None}
+
+    def save_progress(self, puuid, progress):
+        with self.lock:
+            progress["updated"] = time.time()
+            fast_json.dump_file(os.path.join(self.path, f"{puuid}.json"), progress, indent=False)
+
+    def games_of(self, puuid):
+        """已收录的对局详情，新到旧"""
+        return [detail for detail in map(self.load_game, self.load_progress(puuid)["games"]) if detail]
+
+
+class HistoryCrawler:
+    """在后台增量抓取玩家的完整对局历史
+
+    先从最新一页向后补齐上次同步之后的新对局，遇到已收录的对局即停止；
+    再从检查点继续向更早的对局回溯，每抓完一页保存一次进度，中断后从检查点继续。
+    所有LCU请求都以后台优先级经过GameAPI的调度器。
+    """
+
+    def __init__(self, game_api, supervisor, store=None, name="history_crawler",
+                 max_games=CRAWL_MAX_GAMES, page_size=CRAWL_PAGE_SIZE, workers=CRAWL_DETAIL_WORKERS):
+        self.game_api = game_api
+        self.supervisor = supervisor
+        self.store = store or HistoryStore()
+        self.name = name
+        self.max_games = max_games
+        self.page_size = page_size
+        self.workers = workers
+        self.status = {}  # {puuid: {"state", "games", "fetched", "error"}}
+
+    def start(self, puuid=None):
+        """开始抓取，默认抓取当前登录的账号，已在运行时忽略"""
+        task = self.supervisor.get(self.name)
+        if task and task.is_alive():
+            return task
+        return self.supervisor.spawn(self.name, lambda task: self._run(task, puuid), order=35)
+
+    def cancel(self):
+        self.supervisor.cancel(self.name)
+
+    def current_puuid(self):
+        res = self.game_api.get("/lol-summoner/v1/current-summoner", priority=PRIORITY_BACKGROUND)
+        if res.status_code != 200:
+            return None
+        return res.json().get("puuid")
+
+    def fetch_page(self, puuid, beg_index):
+        """请求一页比赛列表，返回对局摘要列表，失败时返回None"""
+        end_index = beg_index + self.page_size - 1
+        res = self.game_api.get(
+            f"/lol-match-history/v1/products/lol/{puuid}/matches?begIndex={beg_index}&endIndex={end_index}",
+            priority=PRIORITY_BACKGROUND
+        )
+        if res.status_code != 200:
+            logging.warning(f"抓取比赛列表失败: {res.status_code}")
+            return None
+        return (res.json().get("games") or {}).get("games", [])
+
+    def fetch_detail(self, game_id):
+        if self.store.has_game(game_id):
+            return True
+        res = self.game_api.get(f"/lol-match-history/v1/games/{game_id}", priority=PRIORITY_BACKGROUND)
+        if res.status_code != 200:
+            return False
+        self.store.save_game(game_id, res.json())
+        return True
+
+    def fetch_details(self, task, game_ids):
+        """并发抓取一页对局的详情，返回成功的id
+
+        提交到任务管理器的后台线程池，每批最多 workers 个，不占用前台请求的线程。
+        """
+        fetched = []
+        for start in range(0, len(game_ids), self.workers):
+            if task.cancelled():
+                break
+            batch = game_ids[start:start + self.workers]
+            futures = [(game_id, self.supervisor.submit_background(self.fetch_detail, game_id)) for game_id in batch]
+            for game_id, future in futures:
+                try:
+                    if future.result():
+                        fetched.append(game_id)
+                except Exception as e:
+                    logging.debug(f"抓取对局详情失败 {game_id}: {e}")
+        return fetched
+
+    def sync_newer(self, task, puuid, known):
+        """抓取上次同步之后的新对局，返回可以收录的id(新到旧)
+
+        从最新一页向后翻页直到遇到已收录的对局。收录时从最靠近已收录部分的一端开始，
+        遇到详情抓取失败即停止，失败的对局及更新的对局留到下次同步，不会被跳过。
+        """
+        fresh = []
+        beg_index = 0
+        while not task.cancelled() and beg_index < self.max_games:
+            games = self.fetch_page(puuid, beg_index)
+            if not games:
+                break
+            ids = [game["gameId"] for game in games]
+            reached = next((i for i, game_id in enumerate(ids) if game_id in known), None)
+            fresh.extend(ids if reached is None else ids[:reached])
+            if reached is not None or len(games) < self.page_size:
+                break
+            beg_index += self.page_size
+        if task.cancelled():
+            return []
+
+        fetched = set(self.fetch_details(task, fresh))
+        accepted = []
+        for game_id in reversed(fresh):
+            if game_id not in fetched:
+                break
+            accepted.append(game_id)
+        accepted.reverse()
+        return accepted
+
+    def _run(self, task, puuid):
+        puuid = puuid or self.current_puuid()
+        if not puuid:
+            logging.warning("无法获取当前账号的puuid，跳过历史战绩抓取")
+            return
+        progress = self.store.load_progress(puuid)
+        known = set(progress["games"])
+        status = self.status[puuid] = {"state": "syncing", "games": len(known), "fetched": 0, "error": None}
+
+        try:
+            # 补齐上次同步之后的新对局，首次抓取时直接进入回溯
+            if progress["games"] or progress["complete"]:
+                newer = self.sync_newer(task, puuid, known)
+                if newer:
+                    progress["games"] = newer + progress["games"]
+                    # 新对局把旧对局向后挤，回溯检查点同步后移
+                    progress["cursor"] += len(newer)
+                    known.update(newer)
+                    status["fetched"] += len(newer)
+                    self.store.save_progress(puuid, progress)
+
+            # 从检查点继续向更早的对局回溯
+            status["state"] = "backfilling"
+            while not task.cancelled() and not progress["complete"] and len(progress["games"]) < self.max_games:
+                games = self.fetch_page(puuid, progress["cursor"])
+                if games is None:
+                    break
+                # 新账号或登录后战绩服务尚未就绪时第一页为空，不标记完成，下次重新抓取
+                if not games and progress["cursor"] == 0:
+                    break
+                ids = [game["gameId"] for game in games if game["gameId"] not in known]
+                fetched = self.fetch_details(task, ids)
+                progress["games"].extend(fetched)
+                known.update(fetched)
+                status["fetched"] += len(fetched)
+                # 取消或有详情抓取失败时不推进检查点，下次从这一页继续
+                if task.cancelled() or len(fetched) < len(ids):
+                    break
+                progress["cursor"] += len(games)
+                progress["complete"] = len(games) < self.page_size
+                self.store.save_progress(puuid, progress)
+                status["games"] = len(progress["games"])
+        except Exception as e:
+            status["error"] = str(e)
+            logging.error(f"抓取历史战绩时出错: {e}")
+        finally:
+            self.store.save_progress(puuid, progress)
+            status["games"] = len(progress["games"])
+            status["state"] = "cancelled" if task.cancelled() else "idle"
+            logging.info(f"历史战绩已同步 {status['games']} 局，本次新增 {status['fetched']} 局")
@@ -0,0 +1,129 @@
+import os
+import json
+import shutil
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image
+import fast_json
+
+ICONS_DIR = "icons"
+# 图标CDN，测试时可替换为本地服务
+ICON_CDN = "https://game.gtimg.cn/images/lol/act/img"
+ITEM_LIST_URL = "https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/item.json"
+ICON_KINDS = ("champion", "item")
+# 图集中每个图标的边长
+ATLAS_TILE = 48
+MAX_WORKERS = 16
+RETRIES = 3
+TIMEOUT = 10
+
+
+def current_icon_dir(icons_dir=ICONS_DIR):
+    """当前版本图标所在目录，未同步时返回None"""
+    try:
+        with open(os.path.join(icons_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            version = json.load(f)["version"]
+    except Exception:
+        return None
+    return os.path.join(icons_dir, version)
+
+
+def list_icon_names(version, champion_json="champion.json", item_list_url=ITEM_LIST_URL):
+    """需要镜像的英雄和装备图标名称"""
+    with open(champion_json, "r", encoding="utf-8") as f:
+        champions = [c["alias"] for c in json.load(f) if c.get("id", -1) > 0]
+    items = list(requests.get(item_list_url.format(version=version), timeout=TIMEOUT).json()["data"].keys())
+    return {"champion": champions, "item": items}
+
+
+def build_atlas(version_dir, names, tile=ATLAS_TILE):
+    """把所有图标拼成一张图集，返回 {kind: {name: [x, y]}}"""
+    entries = [(kind, name) for kind in ICON_KINDS for name in names.get(kind, [])
+               if os.path.exists(os.path.join(version_dir, kind, f"{name}.png"))]
+    if not entries:
+        return {}
+    columns = max(1, int(len(entries) ** 0.5) + 1)
+    rows = (len(entries) + columns - 1) // columns
+    atlas = Image.new("RGBA", (columns * tile, rows * tile))
+    mapping = {"tile": tile, "width": columns * tile, "height": rows * tile}
+    for index, (kind, name) in enumerate(entries):
+        x, y = (index % columns) * tile, (index // columns) * tile
+        try:
+            with Image.open(os.path.join(version_dir, kind, f"{name}.png")) as icon:
+                atlas.paste(icon.convert("RGBA").resize((tile, tile), Image.LANCZOS), (x, y))
+        except Exception as e:
+            logging.warning(f"图标加入图集失败 {kind}/{name}: {e}")
+            continue
+        mapping.setdefault(kind, {})[name] = [x, y]
+    # 图集和映射都先写临时文件再替换，Web服务同时读取时不会拿到写了一半的文件
+    atlas_path = os.path.join(version_dir, "atlas.png")
+    atlas.save(atlas_path + ".tmp", format="PNG", optimize=True)
+    os.replace(atlas_path + ".tmp", atlas_path)
+    fast_json.dump_file(os.path.join(version_dir, "atlas.json"), mapping, indent=False)
+    return mapping
+
+
+def sync_icons(version=None, icons_dir=ICONS_DIR, base_url=ICON_CDN, item_list_url=ITEM_LIST_URL,
+               champion_json="champion.json", max_workers=MAX_WORKERS):
+    """按游戏版本同步英雄和装备图标到本地并生成图集
+
+    已同步的版本只补齐缺失的图标；版本变化时写入新目录并删除旧版本。
+    CDN上不存在(404)的图标直接跳过，不算失败。
+
+    Returns:
+        (version_dir, failed): 版本目录和下载失败的图标数量
+    """
+    if version is None:
+        version = requests.get("https://ddragon.leagueoflegends.com/api/versions.json", timeout=TIMEOUT).json()[0]
+    version_dir = os.path.join(icons_dir, version)
+    names = list_icon_names(version, champion_json, item_list_url)
+
+    tasks = []
+    for kind in ICON_KINDS:
+        os.makedirs(os.path.join(version_dir, kind), exist_ok=True)
+        for name in names[kind]:
+            path = os.path.join(version_dir, kind, f"{name}.png")
+            if not os.path.exists(path):
+                tasks.append((f"{base_url}/{kind}/{name}.png", path))
+
+    def download(url, path):
+        for attempt in range(RETRIES):
+            try:
+                resp = requests.get(url, timeout=TIMEOUT)
+                if resp.status_code == 200:
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(resp.content)
+                    os.replace(path + ".tmp", path)
+                    return True
+                if resp.status_code == 404:
+                    return None
+            except Exception:
+                pass
+        return False
+
+    failed = 0
+    absent = 0
+    if tasks:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(download, url, path) for url, path in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    absent += 1
+                elif not result:
+                    failed += 1
+
+    if tasks or not os.path.exists(os.path.join(version_dir, "atlas.png")):
+        build_atlas(version_dir, names)
+
+    fast_json.dump_file(os.path.join(icons_dir, "manifest.json"), {"version": version}, indent=False)
+
+    # 删除旧版本的图标
+    for entry in os.listdir(icons_dir):
+        path = os.path.join(icons_dir, entry)
+        if entry != version and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    logging.info(f"图标同步完成: 版本 {version}, 新增 {len(tasks) - failed - absent} 个, 失败 {failed} 个")
+    return version_dir, failed
@@ -0,0 +1,190 @@
+import os
+import time
+import logging
+import psutil
+
+# 上一次发现的客户端目录(LeagueClient.exe所在目录)
+INSTALL_PATH_CACHE = "install_path"
+CLIENT_PROCESS_NAMES = {"LeagueClientUx.exe", "LeagueClient.exe", "LeagueClientUx", "LeagueClient"}
+GAME_PROCESS_NAMES = {"League of Legends.exe", "League of Legends"}
+
+
+def game_dir(install_dir):
+    """客户端目录对应的游戏目录"""
+    return install_dir.replace("LeagueClient", "Game") if install_dir else ""
+
+
+class LcuCredentials:
+    """LCU连接信息"""
+
+    def __init__(self, port, token, protocol="https", pid=None, install_dir=None):
+        self.port = str(port)
+        self.token = token
+        self.protocol = protocol or "https"
+        self.pid = pid
+        self.install_dir = install_dir
+
+    @property
+    def url(self):
+        return f"{self.protocol}://riot:{self.token}@127.0.0.1:{self.port}"
+
+    def __eq__(self, other):
+        return isinstance(other, LcuCredentials) and (self.port, self.token) == (other.port, other.token)
+
+
+def get_full_process_image_name(pid):
+    """Windows下以受限权限读取进程路径，用于psutil无权限时的兜底"""
+    if os.name != "nt":
+        return ""
+    import ctypes
+    from ctypes import wintypes
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    h_process = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not h_process:
+        return ""
+
+    buffer_len = wintypes.DWORD(32767)
+    buffer = ctypes.create_unicode_buffer(buffer_len.value)
+    try:
+        if ctypes.windll.kernel32.QueryFullProcessImageNameW(h_process, 0, buffer, ctypes.byref(buffer_len)):
+            return buffer.value
+        return ""
+    finally:
+        ctypes.windll.kernel32.CloseHandle(h_process)
+
+
+class LcuDiscovery:
+    """LCU发现
+
+    优先读取缓存的客户端目录下的lockfile获取端口和token，
+    只有lockfile不可用时才遍历进程，发现后记住客户端目录。
+    """
+
+    def __init__(self, cache_path=INSTALL_PATH_CACHE):
+        self.cache_path = cache_path
+        self.install_dir = self.load_install_dir()
+
+    def load_install_dir(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                path = f.read().strip()
+            return path or None
+        except OSError:
+            return None
+
+    def save_install_dir(self, install_dir):
+        if not install_dir or install_dir == self.install_dir:
+            return
+        self.install_dir = install_dir
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                f.write(install_dir)
+            logging.info(f"已记录客户端目录: {install_dir}")
+        except OSError as e:
+            logging.warning(f"记录客户端目录失败: {e}")
+
+    @staticmethod
+    def read_lockfile(install_dir):
+        """读取lockfile，格式为 name:pid:port:password:protocol"""
+        if not install_dir:
+            return None
+        lockfile = os.path.join(install_dir, "lockfile")
+        try:
+            with open(lockfile, "r", encoding="utf-8") as f:
+                parts = f.read().strip().split(":")
+        except OSError:
+            return None
+        if len(parts) < 5:
+            return None
+        _, pid, port, token, protocol = parts[:5]
+        try:
+            pid = int(pid)
+        except ValueError:
+            return None
+        # 客户端异常退出时lockfile可能残留
+        if not psutil.pid_exists(pid):
+            logging.debug(f"lockfile对应的进程已不存在: {pid}")
+            return None
+        return LcuCredentials(port, token, protocol, pid, install_dir)
+
+    @staticmethod
+    def process_path(proc):
+        try:
+            return proc.exe()
+        except (psutil.AccessDenied, psutil.NoSuchProcess, OSError):
+            return get_full_process_image_name(proc.pid)
+
+    @staticmethod
+    def parse_cmdline(cmdline):
+        """从LeagueClientUx命令行解析端口和token"""
+        args = {}
+        for arg in cmdline or []:
+            if arg.startswith("--") and "=" in arg:
+                key, value = arg[2:].split("=", 1)
+                args[key] = value.strip('"')
+        return args
+
+    def iter_clients(self):
+        """遍历进程查找所有客户端，只对名称匹配的进程读取命令行"""
+        seen = set()
+        for proc in psutil.process_iter(['name']):
+            name = proc.info['name']
+            if name not in CLIENT_PROCESS_NAMES:
+                continue
+            try:
+                args = self.parse_cmdline(proc.cmdline())
+            except (psutil.AccessDenied, psutil.NoSuchProcess):
+                args = {}
+            install_dir = args.get("install-directory")
+            if not install_dir:
+                path = self.process_path(proc)
+                install_dir = os.path.dirname(path) if path else None
+            if args.get("app-port") and args.get("remoting-auth-token"):
+                credentials = LcuCredentials(args["app-port"], args["remoting-auth-token"], "https", proc.pid, install_dir)
+            else:
+                # LeagueClient.exe本身没有端口参数，但能找到lockfile
+                credentials = self.read_lockfile(install_dir)
+            # LeagueClient和LeagueClientUx会指向同一个客户端
+            if credentials and (credentials.port, credentials.token) not in seen:
+                seen.add((credentials.port, credentials.token))
+                yield credentials
+
+    def scan_processes(self):
+        """查找第一个客户端"""
+        return next(self.iter_clients(), None)
+
+    def discover_all(self):
+        """查找所有正在运行的客户端"""
+        return list(self.iter_clients())
+
+    def discover(self, retries=5, delay=2):
+        """获取LCU连接信息，找不到时返回None"""
+        for attempt in range(retries):
+            credentials = self.read_lockfile(self.install_dir)
+            if not credentials:
+                credentials = self.scan_processes()
+            if credentials:
+                self.save_install_dir(credentials.install_dir)
+                return credentials
+            if attempt < retries - 1:
+                logging.info("未找到LeagueClientUx.exe，正在重试...")
+                time.sleep(delay)
+        return None
+
+    def game_path(self):
+        """获取游戏目录，优先使用缓存的客户端目录"""
+        install_dir = self.install_dir
+        if not install_dir or not os.path.isdir(install_dir):
+            credentials = self.scan_processes()
+            install_dir = credentials.install_dir if credentials else None
+            if install_dir:
+                self.save_install_dir(install_dir)
+        if install_dir:
+            return game_dir(install_dir)
+        # 游戏进程中直接获取
+        for proc in psutil.process_iter(['name']):
+            if proc.info['name'] in GAME_PROCESS_NAMES:
+                path = self.process_path(proc)
+                if path:
+                    return os.path.dirname(path)
+        return ""
@@ -0,0 +1,116 @@
+import time
+import heapq
+import itertools
+import threading
+
+# 请求优先级，数值越小越先执行
+PRIORITY_CRITICAL = 0    # 英雄监控、阶段轮询等影响选皮肤的请求
+PRIORITY_NORMAL = 1      # 页面直接触发的请求
+PRIORITY_BACKGROUND = 2  # 战绩抓取、身份解析等可以延后的请求
+PRIORITY_NAMES = {PRIORITY_CRITICAL: "critical", PRIORITY_NORMAL: "normal", PRIORITY_BACKGROUND: "background"}
+
+# 每秒补充的令牌数和桶容量
+GOVERNOR_RATE = 20
+GOVERNOR_BURST = 10
+# 同时进行中的请求上限
+GOVERNOR_MAX_CONCURRENCY = 4
+
+
+class RequestGovernor:
+    """LCU请求调度器
+
+    令牌桶限制请求速率，信号量限制并发数，等待中的请求按优先级出队，
+    同一优先级内先到先得。战绩批量抓取时英雄监控的请求仍然可以立即插队。
+    """
+
+    def __init__(self, rate=GOVERNOR_RATE, burst=GOVERNOR_BURST, max_concurrency=GOVERNOR_MAX_CONCURRENCY):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.waiting = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.stats_by_priority = {
+            priority: {"requests": 0, "waitTotal": 0.0, "waitMax": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """等待轮到本请求，返回等待时间(秒)"""
+        start = time.monotonic()
+        entry = (priority, next(self.counter))
+        with self.condition:
+            heapq.heappush(self.waiting, entry)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.waiting[0] == entry and self.in_flight < self.max_concurrency and self.tokens >= 1:
+                    break
+                # 令牌不足时等到下一个令牌生成，其余情况等待release唤醒
+                timeout = None
+                if self.waiting[0] == entry and self.tokens < 1:
+                    timeout = (1 - self.tokens) / self.rate
+                self.condition.wait(timeout)
+            heapq.heappop(self.waiting)
+            self.tokens -= 1
+            self.in_flight += 1
+            waited = time.monotonic() - start
+            stats = self.stats_by_priority.setdefault(priority, {"requests": 0, "waitTotal": 0.0, "waitMax": 0.0})
+            stats["requests"] += 1
+            stats["waitTotal"] += waited
+            stats["waitMax"] = max(stats["waitMax"], waited)
+            # 队首变化，唤醒下一个等待者
+            self.condition.notify_all()
+        return waited
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def slot(self, priority=PRIORITY_NORMAL):
+        """with governor.slot(priority): 包裹一次请求"""
+        return _GovernorSlot(self, priority)
+
+    def stats(self):
+        """队列深度、进行中的请求数和各优先级的等待时间"""
+        with self.condition:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self.waiting:
+                depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            return {
+                "inFlight": self.in_flight,
+                "maxConcurrency": self.max_concurrency,
+                "rate": self.rate,
+                "tokens": round(self.tokens, 2),
+                "queueDepth": depth,
+                "priorities": {
+                    PRIORITY_NAMES.get(priority, str(priority)): {
+                        "requests": stats["requests"],
+                        "avgWaitMs": round(stats["waitTotal"] / stats["requests"] * 1000, 1) if stats["requests"] else 0,
+                        "maxWaitMs": round(stats["waitMax"] * 1000, 1)
+                    }
+                    for priority, stats in self.stats_by_priority.items()
+                }
+            }
+
+
+class _GovernorSlot:
+    def __init__(self, governor, priority):
+        self.governor = governor
+        self.priority = priority
+
+    def __enter__(self):
+        self.governor.acquire(self.priority)
+        return self
+
+    def __exit__(self, *exc):
+        self.governor.release()
+        return False
@@ -0,0 +1,60 @@
+import logging
+
+# 前端战绩面板提供的模式过滤
+PREFETCH_MODES = ['ALL', 'SOLO_DUO', 'FLEX', 'ARAM', 'URF', 'PRACTICETOOL']
+# 预取轮询间隔，用于发现新加入的成员
+PREFETCH_INTERVAL = 2
+
+
+class LobbyPrefetcher:
+    """英雄选择开始时在后台预热房间成员的身份和战绩
+
+    预取结果写入 GameStats 的会话缓存，打开战绩面板时基本只需读缓存。
+    房间解散时取消。
+    """
+
+    def __init__(self, game_stats, supervisor, modes=None, name="lobby_prefetch"):
+        self.game_stats = game_stats
+        self.supervisor = supervisor
+        self.name = name
+        self.modes = modes or PREFETCH_MODES
+
+    def start(self):
+        """开始预取，已在运行时忽略"""
+        task = self.supervisor.get(self.name)
+        if task and task.is_alive():
+            return
+        self.supervisor.spawn(self.name, self._run, order=30)
+        logging.info("进入英雄选择，开始预取房间战绩")
+
+    def cancel(self):
+        """取消预取"""
+        if self.supervisor.cancel(self.name):
+            logging.info("英雄选择结束，已取消战绩预取")
+
+    def _run(self, task):
+        """预取循环，每轮只会对缓存未命中的成员发起请求"""
+        while not task.cancelled():
+            try:
+                players = self.game_stats.get_current_game_players() or []
+                # 自己的ID是字符串，成员的是整数，统一后去重，避免重复请求自己的战绩
+                summoner_ids = [str(p["summonerId"]) for p in players if p.get("summonerId")]
+                if self.game_stats.summoner_id:
+                    summoner_ids.insert(0, str(self.game_stats.summoner_id))
+                summoner_ids = list(dict.fromkeys(summoner_ids))
+
+                def warm(summoner_id, mode):
+                    if not task.cancelled():
+                        self.game_stats.get_cached_match_history(summoner_id, mode=mode)
+
+                # 使用后台线程池，6个模式乘以成员数的请求不会挤占页面请求的线程
+                futures = [
+                    self.supervisor.submit_background(warm, summoner_id, mode)
+                    for mode in self.modes
+                    for summoner_id in summoner_ids
+                ]
+                for future in futures:
+                    future.result()
+            except Exception as e:
+                logging.error(f"预取房间战绩时出错: {e}")
+            task.stop_event.wait(PREFETCH_INTERVAL)
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = "logs"
+LOG_FILE = "app.log"
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# 单个日志文件大小和保留数量
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# 相同的警告和错误在该时间窗口(秒)内只输出一次
+DEDUP_WINDOW = 30
+# 每秒最多输出的日志条数，超出的部分丢弃并在之后汇总提示；WARNING及以上不受限制
+RATE_LIMIT = 50
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行json"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if getattr(record, "repeated", 0):
+            entry["repeated"] = record.repeated
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ThrottleFilter(logging.Filter):
+    """日志去重和限流
+
+    在调用线程中执行，只做字典查找，被过滤的日志不会进入队列。
+    相同的警告和错误在窗口期内只保留第一条，窗口结束后下一条附带被省略的次数；
+    普通日志按每秒条数限流。
+    """
+
+    def __init__(self, window=DEDUP_WINDOW, rate=RATE_LIMIT):
+        super().__init__()
+        self.window = window
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.seen = {}  # {(logger, level, msg): [首次时间, 省略次数]}
+        self.second = 0
+        self.count = 0
+        self.dropped = 0
+
+    def filter(self, record):
+        now = time.monotonic()
+        record.repeated = 0
+        with self.lock:
+            if record.levelno >= logging.WARNING:
+                key = (record.name, record.levelno, str(record.msg))
+                entry = self.seen.get(key)
+                if entry and now - entry[0] < self.window:
+                    entry[1] += 1
+                    return False
+                record.repeated = entry[1] if entry else 0
+                self.seen[key] = [now, 0]
+                if len(self.seen) > 1000:
+                    self.seen = {k: v for k, v in self.seen.items() if now - v[0] < self.window}
+            else:
+                second = int(now)
+                if second != self.second:
+                    if self.dropped:
+                        record.dropped = self.dropped
+                        self.dropped = 0
+                    self.second = second
+                    self.count = 0
+                self.count += 1
+                if self.count > self.rate:
+                    self.dropped += 1
+                    return False
+
+        if record.repeated:
+            record.msg = f"{record.msg} (过去{self.window}秒内重复 {record.repeated} 次)"
+        if getattr(record, "dropped", 0):
+            record.msg = f"{record.msg} (日志过多，已丢弃 {record.dropped} 条)"
+        return True
+
+
+def setup_logging(level=logging.INFO, log_dir=LOG_DIR):
+    """把日志输出移到后台线程
+
+    各线程只把日志放入队列，由后台线程写入控制台和按大小滚动的json日志文件，
+    控制台或磁盘变慢时不会阻塞监控循环和请求线程。
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [console]
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = RotatingFileHandler(os.path.join(log_dir, LOG_FILE), maxBytes=LOG_MAX_BYTES,
+                                           backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    except OSError as e:
+        print(f"无法创建日志文件: {e}")
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(ThrottleFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    def stop_listener():
+        # 退出时写完队列中剩余的日志，已手动停止时忽略
+        try:
+            listener.stop()
+        except AttributeError:
+            pass
+
+    atexit.register(stop_listener)
+    return listener
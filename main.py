@@ -1,4 +1,3 @@
-import threading
 import requests
 import logging
 import os
@@ -6,67 +5,58 @@ import time
 import subprocess
 import shutil
 import globals
-import signal
-import psutil
 import sys
 from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
 from tools import *
 from web_server import SkinWebServer
-from champion_monitor import ChampionMonitor
 from game_api import GameAPI
-from game_stats import GameStats
+from session_manager import SessionManager
+from task_supervisor import TaskSupervisor
+from zip_index import ZipIndex
+from icon_mirror import current_icon_dir
+from cache_node import CacheNodeServer, CacheNodeClient, CACHE_NODE_URL, CACHE_NODE_PORT
+from log_setup import setup_logging
 
-def cleanup_processes():
-    """清理所有相关进程"""
-    current_process = psutil.Process()
-    try:
-        # 获取所有子进程
-        children = current_process.children(recursive=True)
-        for child in children:
-            try:
-                logging.info(f"正在终止进程: {child.pid}")
-                child.terminate()
-            except psutil.NoSuchProcess:
-                pass
-            except Exception as e:
-                logging.error(f"终止进程 {child.pid} 时出错: {e}")
-        
-        # 等待所有子进程结束
-        gone, alive = psutil.wait_procs(children, timeout=3)
-        for p in alive:
-            try:
-                p.kill()
-            except psutil.NoSuchProcess:
-                pass
-    except Exception as e:
-        logging.error(f"清理进程时出错: {e}")
+# 日志由后台线程写入控制台和logs目录
+setup_logging()
 
-def signal_handler(signum, frame):
-    """处理终止信号"""
-    logging.info("收到终止信号，正在清理...")
-    cleanup_processes()
-    sys.exit(0)
-
-# 注册信号处理器
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+# 统一管理所有后台任务和子进程
+supervisor = TaskSupervisor()
+supervisor.install_signal_handlers()
 
 '''
     config 
 '''
 # 屏蔽SSL警告
 requests.packages.urllib3.disable_warnings() 
-# 设置日志格式
-logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+# Web服务器在皮肤目录同步之后创建
+web_server = None
+
+def refresh_skin_indexes():
+    """皮肤数据或skins目录同步后，清空Web服务器上的炫彩索引并重新加载皮肤目录"""
+    if web_server is None:
+        return
+    web_server.chromas.invalidate()
+    web_server.refresh_catalog()
+
+def update_skin_task(task):
+    updateSkin()
+    refresh_skin_indexes()
 
 ### 初始化
 globals.is_latest = checkIsLatestVersion()
 if(not globals.is_latest):
     # 如果不是最新版本 更新皮肤相关数据
-    t = threading.Thread(target=updateSkin)
-    t.start()
+    supervisor.spawn("update_skin", update_skin_task, order=0)
+else:
+    # 补齐缺失的预览占位图
+    supervisor.spawn("placeholders", lambda task: generate_placeholders(), order=0)
+    # 首次运行时补齐图标镜像
+    if current_icon_dir() is None:
+        supervisor.spawn("icon_mirror", lambda task: sync_icons(), order=0)
 
 def is_repo_valid(repo_path):
     """检查仓库是否完整有效"""
@@ -148,6 +138,15 @@ def sync_skins_repo():
     temp_dir = os.path.join(os.getcwd(), "_temp_repo")
     skins_dir = os.path.join(os.getcwd(), "skins")
     
+    # 配置了缓存节点时只从节点拉取差异文件
+    if CACHE_NODE_URL:
+        try:
+            _, failed = CacheNodeClient().sync("skins", purge=True)
+            if not failed:
+                return True
+        except Exception as e:
+            logging.warning(f"从缓存节点同步skins失败，改用git: {e}")
+    
     # 如果不需要更新，直接返回
     if not check_for_updates(temp_dir):
         return True
@@ -209,10 +208,19 @@ try:
     if not sync_result:
         logging.error("同步skins目录失败，程序退出")
         sys.exit(1)
+    refresh_skin_indexes()
 except Exception as e:
     logging.error(f"同步skins目录失败: {e}")
     sys.exit(1)
 
+# 作为局域网缓存节点对外提供资源
+if CACHE_NODE_PORT:
+    CacheNodeServer(supervisor).start(CACHE_NODE_PORT)
+
+# 后台刷新皮肤压缩包索引
+zip_index = ZipIndex()
+supervisor.spawn("zip_index", lambda task: zip_index.refresh(), order=0)
+
 # 初始化游戏API
 try:
     game_api = GameAPI()
@@ -220,27 +228,24 @@ except Exception as e:
     logging.error(f"GameAPI对象创建失败: {e}")
     sys.exit(1)
 
-# 初始化游戏统计
-game_stats = GameStats(game_api)
-
 # 加载皮肤数据
 normal_tools = tools()
 skin_dict = normal_tools.list_skin_directories()
 
-# 初始化modTools
+# 创建Web服务器，皮肤目录和图片缓存由所有客户端会话共享
+web_server = SkinWebServer(supervisor, zip_index=zip_index)
+web_server.start(18081)
+
+# 每个客户端一个会话，各自拥有阶段调度器、战绩预取和英雄监控
+sessions = SessionManager(supervisor, web_server, skin_dict)
+web_server.sessions = sessions
+# 首个会话需要找到游戏目录才能注入皮肤
 try:
-    modtools = modTools()
+    sessions.add(game_api)
 except Exception as e:
-    logging.error(f"modTools对象创建失败: {e}")
+    logging.error(f"创建客户端会话失败: {e}")
     sys.exit(1)
-
-# 创建Web服务器
-web_server = SkinWebServer(modtools, game_stats)
-web_server.start(18081)
-
-# 创建并启动英雄监控
-champion_monitor = ChampionMonitor(game_api, web_server, skin_dict)
-champion_monitor.start_monitoring()
+sessions.start()
 
 # 保持主线程运行
 try:
@@ -250,7 +255,4 @@ try:
 except KeyboardInterrupt:
     logging.info("程序已退出")
 finally:
-    if 'champion_monitor' in locals():
-        champion_monitor.stop()
-    if 'web_server' in locals():
-        web_server.stop()
+    supervisor.shutdown()
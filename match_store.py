@@ -0,0 +1,37 @@
+import threading
+from collections import OrderedDict
+
+# 内存中最多保留的对局详情数量
+MATCH_STORE_MAX_ITEMS = 500
+
+
+class MatchStore:
+    """对局详情缓存，多个客户端会话共享
+
+    对局结束后详情不会再变化，同一局里的多个账号只需要请求一次。
+    内存未命中时从历史战绩抓取器的本地存储读取。
+    """
+
+    def __init__(self, max_items=MATCH_STORE_MAX_ITEMS, store=None):
+        self.max_items = max_items
+        self.store = store
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, game_id):
+        with self.lock:
+            data = self.items.get(str(game_id))
+            if data is not None:
+                self.items.move_to_end(str(game_id))
+                return data
+        data = self.store.load_game(game_id) if self.store else None
+        if data is not None:
+            self.put(game_id, data)
+        return data
+
+    def put(self, game_id, data):
+        with self.lock:
+            self.items[str(game_id)] = data
+            self.items.move_to_end(str(game_id))
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
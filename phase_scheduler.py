@@ -0,0 +1,147 @@
+import time
+import logging
+import threading
+
+# 各游戏流程阶段下轮询阶段本身的间隔(秒)
+PHASE_POLL_INTERVALS = {
+    "None": 5,
+    "Lobby": 2,
+    "Matchmaking": 1,
+    "ReadyCheck": 0.5,
+    "ChampSelect": 0.5,
+    "GameStart": 5,
+    "InProgress": 10,
+    "Reconnect": 5,
+    "WaitingForStats": 3,
+    "PreEndOfGame": 3,
+    "EndOfGame": 3
+}
+DEFAULT_PHASE_POLL_INTERVAL = 3
+# 客户端未启动或连接失败时的轮询间隔
+DISCONNECTED_POLL_INTERVAL = 10
+
+# 前端页面轮询间隔(毫秒)
+CLIENT_POLL_INTERVALS = {
+    "ChampSelect": 1000,
+    "ReadyCheck": 2000,
+    "Matchmaking": 3000,
+    "Lobby": 3000
+}
+DEFAULT_CLIENT_POLL_INTERVAL = 10000
+
+
+class PhaseScheduler:
+    """根据LCU游戏流程阶段调度后台任务的轮询间隔
+
+    每个任务按阶段配置间隔，未配置的阶段视为暂停；
+    阶段切换时触发 on_enter / on_leave / on_transition 钩子。
+    """
+
+    def __init__(self, game_api, supervisor, name="phase_scheduler"):
+        self.game_api = game_api
+        self.supervisor = supervisor
+        self.name = name
+        self.phase = "None"
+        self.connected = True
+        self.tasks = {}
+        self.enter_hooks = {}
+        self.leave_hooks = {}
+        self.transition_hooks = []
+        self.lock = threading.Lock()
+
+    def register(self, name, func, intervals):
+        """注册后台任务
+
+        Args:
+            name: 任务名称
+            func: 无参数的可调用对象
+            intervals: {阶段: 间隔秒数}，未列出的阶段不执行
+        """
+        with self.lock:
+            self.tasks[name] = {"func": func, "intervals": intervals, "next_run": 0}
+
+    def unregister(self, name):
+        with self.lock:
+            self.tasks.pop(name, None)
+
+    def on_enter(self, phase, callback):
+        """进入阶段时调用 callback(old_phase, new_phase)"""
+        self.enter_hooks.setdefault(phase, []).append(callback)
+
+    def on_leave(self, phase, callback):
+        """离开阶段时调用 callback(old_phase, new_phase)"""
+        self.leave_hooks.setdefault(phase, []).append(callback)
+
+    def on_transition(self, callback):
+        """任意阶段切换时调用 callback(old_phase, new_phase)"""
+        self.transition_hooks.append(callback)
+
+    def client_poll_interval(self):
+        """当前阶段下前端页面的轮询间隔(毫秒)"""
+        return CLIENT_POLL_INTERVALS.get(self.phase, DEFAULT_CLIENT_POLL_INTERVAL)
+
+    def start(self):
+        task = self.supervisor.spawn(self.name, self._loop, restart="on-failure", order=20)
+        logging.info("阶段调度器已启动")
+        return task
+
+    def stop(self):
+        if self.supervisor.cancel(self.name):
+            logging.info("阶段调度器已停止")
+
+    def _poll_phase(self):
+        """获取当前阶段，返回下一次轮询阶段的间隔"""
+        try:
+            phase = self.game_api.get_gameflow_phase() or "None"
+            if not self.connected:
+                logging.info("已重新连接到LCU")
+            self.connected = True
+        except Exception as e:
+            if self.connected:
+                logging.error(f"获取游戏流程阶段失败: {e}")
+            self.connected = False
+            phase = "None"
+        if phase != self.phase:
+            self._transition(self.phase, phase)
+        if not self.connected:
+            return DISCONNECTED_POLL_INTERVAL
+        return PHASE_POLL_INTERVALS.get(phase, DEFAULT_PHASE_POLL_INTERVAL)
+
+    def _transition(self, old_phase, new_phase):
+        logging.info(f"游戏流程阶段变化: {old_phase} -> {new_phase}")
+        self.phase = new_phase
+        hooks = self.leave_hooks.get(old_phase, []) + self.enter_hooks.get(new_phase, []) + self.transition_hooks
+        for hook in hooks:
+            try:
+                hook(old_phase, new_phase)
+            except Exception as e:
+                logging.error(f"阶段切换钩子执行出错: {e}")
+        # 切换后新阶段的任务立即执行一次
+        with self.lock:
+            for job in self.tasks.values():
+                job["next_run"] = 0
+
+    def _loop(self, task):
+        next_phase_poll = 0
+        while not task.cancelled():
+            now = time.monotonic()
+            if now >= next_phase_poll:
+                next_phase_poll = now + self._poll_phase()
+
+            with self.lock:
+                jobs = list(self.tasks.items())
+            next_wakeup = next_phase_poll
+            for name, job in jobs:
+                interval = job["intervals"].get(self.phase)
+                if interval is None:
+                    continue
+                now = time.monotonic()
+                if now >= job["next_run"]:
+                    try:
+                        job["func"]()
+                    except Exception as e:
+                        logging.error(f"任务 {name} 执行出错: {e}")
+                    job["next_run"] = time.monotonic() + interval
+                next_wakeup = min(next_wakeup, job["next_run"])
+
+            task.stop_event.wait(max(0, next_wakeup - time.monotonic()))
@@ -0,0 +1,88 @@
+import os
+import io
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image
+import fast_json
+
+PLACEHOLDERS_PATH = "placeholders.json"
+# 占位图宽度，高度按比例计算
+PLACEHOLDER_WIDTH = 32
+MAX_WORKERS = 8
+
+
+def make_placeholder(path, width=PLACEHOLDER_WIDTH):
+    """生成低质量占位图，返回data URI"""
+    with Image.open(path) as img:
+        # JPEG按DCT缩放解码，只解码需要的分辨率
+        img.draft("RGB", (width * 2, width * 2))
+        img = img.convert("RGB")
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.BILINEAR)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=40, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def generate_placeholders(skins_json_path="skins.json", save_dir="id_skins", output_path=PLACEHOLDERS_PATH, max_workers=MAX_WORKERS):
+    """为新的皮肤ID并行生成占位图，已生成的跳过，返回生成失败的数量"""
+    try:
+        placeholders = fast_json.load_file(output_path)
+    except Exception:
+        placeholders = {}
+
+    skins_data = fast_json.load_file(skins_json_path)
+
+    tasks = []
+    for skins in skins_data.values():
+        for skin in skins:
+            skin_id = str(skin["id"])
+            path = os.path.join(save_dir, f"{skin_id}.jpg")
+            if skin_id not in placeholders and os.path.exists(path):
+                tasks.append((skin_id, path))
+
+    if not tasks:
+        logging.info(f"占位图无需更新，共 {len(placeholders)} 个")
+        return 0
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(make_placeholder, path): skin_id for skin_id, path in tasks}
+        for future in as_completed(futures):
+            skin_id = futures[future]
+            try:
+                placeholders[skin_id] = future.result()
+            except Exception as e:
+                failed += 1
+                logging.warning(f"生成占位图失败 {skin_id}: {e}")
+
+    # 先写临时文件再替换，PlaceholderStore不会读到写了一半的文件
+    fast_json.dump_file(output_path, placeholders, indent=False)
+    logging.info(f"已生成 {len(tasks) - failed} 个占位图，失败 {failed} 个，共 {len(placeholders)} 个")
+    return failed
+
+
+class PlaceholderStore:
+    """占位图目录，文件更新后自动重新加载"""
+
+    def __init__(self, path=PLACEHOLDERS_PATH):
+        self.path = path
+        self.mtime = None
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, skin_id):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        with self.lock:
+            if mtime != self.mtime:
+                try:
+                    self.data = fast_json.load_file(self.path)
+                    self.mtime = mtime
+                except Exception as e:
+                    logging.warning(f"读取占位图失败: {e}")
+            return self.data.get(str(skin_id))
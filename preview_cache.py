@@ -0,0 +1,78 @@
+import logging
+import threading
+from collections import OrderedDict
+
+# 预览图内存缓存上限
+PREVIEW_CACHE_BUDGET = 64 * 1024 * 1024
+
+
+class PreviewCache:
+    """按字节预算限制的预览图LRU缓存
+
+    热点预览图常驻内存，超出预算时淘汰最久未使用的图片；
+    未命中时由调用方直接走文件响应，不经过Python缓冲区复制。
+    """
+
+    def __init__(self, budget=PREVIEW_CACHE_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            data = self.items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        # 单张超过预算的图片不缓存
+        if len(data) > self.budget:
+            return
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.items[key] = data
+            self.size += len(data)
+            while self.size > self.budget:
+                _, evicted = self.items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def load(self, key, path):
+        """读取文件放入缓存，已缓存时跳过"""
+        with self.lock:
+            if key in self.items:
+                return True
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        self.put(key, data)
+        return True
+
+    def warm(self, entries):
+        """预热一批预览图
+
+        Args:
+            entries: [(key, path), ...]
+        """
+        loaded = sum(1 for key, path in entries if self.load(key, path))
+        logging.debug(f"预览图缓存已预热 {loaded} 张，当前占用 {self.size // 1024} KB")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "items": len(self.items),
+                "size": self.size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses
+            }
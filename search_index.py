@@ -0,0 +1,167 @@
+import re
+import bisect
+import threading
+
+# 模糊匹配时查询的三元组至少命中的比例
+FUZZY_THRESHOLD = 0.5
+SEARCH_LIMIT = 20
+
+
+def tokenize(text):
+    """拆分为小写词，中文名称整体作为一个词"""
+    return [t for t in re.split(r"[^0-9a-z一-鿿]+", (text or "").lower()) if t]
+
+
+def trigrams(token):
+    """词的三元组，两端补空格，两个字的中文词也能产生三元组"""
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkinSearchIndex:
+    """全部英雄皮肤的内存搜索索引
+
+    词表按字典序保存，前缀匹配用二分查找定位范围；
+    前缀没有结果时退化为三元组模糊匹配，可以容忍拼写错误。
+    索引内容包括皮肤名、英雄英文名和champion.json中的中文名，按英雄增量更新。
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.docs = {}             # {皮肤id: 文档}
+        self.doc_tokens = {}       # {皮肤id: (皮肤名词集合, 全部词集合)}
+        self.by_champion = {}      # {英雄: 该英雄的皮肤列表快照}
+        self.token_docs = {}       # {词: 皮肤id集合}
+        self.sorted_tokens = []
+        self.gram_docs = {}        # {三元组: 皮肤id集合}
+
+    def _add_token(self, token, doc_id):
+        docs = self.token_docs.get(token)
+        if docs is None:
+            docs = self.token_docs[token] = set()
+            bisect.insort(self.sorted_tokens, token)
+        docs.add(doc_id)
+        for gram in trigrams(token):
+            self.gram_docs.setdefault(gram, set()).add(doc_id)
+
+    def _remove_token(self, token, doc_id):
+        docs = self.token_docs.get(token)
+        if docs is not None:
+            docs.discard(doc_id)
+            if not docs:
+                del self.token_docs[token]
+                index = bisect.bisect_left(self.sorted_tokens, token)
+                if index < len(self.sorted_tokens) and self.sorted_tokens[index] == token:
+                    del self.sorted_tokens[index]
+        for gram in trigrams(token):
+            grams = self.gram_docs.get(gram)
+            if grams is not None:
+                grams.discard(doc_id)
+                if not grams:
+                    del self.gram_docs[gram]
+
+    def _remove_champion(self, champion):
+        for skin in self.by_champion.pop(champion, []):
+            doc_id = str(skin["id"])
+            self.docs.pop(doc_id, None)
+            _, tokens = self.doc_tokens.pop(doc_id, (set(), set()))
+            for token in tokens:
+                self._remove_token(token, doc_id)
+
+    def update_champion(self, champion, skins, champion_name=None):
+        """重建单个英雄的索引"""
+        with self.lock:
+            self._remove_champion(champion)
+            if not skins:
+                return
+            champion_tokens = set(tokenize(champion)) | set(tokenize(champion_name))
+            for skin in skins:
+                doc_id = str(skin["id"])
+                name_tokens = set(tokenize(skin["name"]))
+                tokens = name_tokens | champion_tokens
+                self.docs[doc_id] = {
+                    "id": doc_id,
+                    "skin": skin["name"],
+                    "champion": champion,
+                    "championName": champion_name
+                }
+                self.doc_tokens[doc_id] = (name_tokens, tokens)
+                for token in tokens:
+                    self._add_token(token, doc_id)
+            self.by_champion[champion] = list(skins)
+
+    def sync(self, skins_data, champion_names=None):
+        """与皮肤目录同步，只重建有变化的英雄
+
+        Args:
+            skins_data: skins.json的内容 {英雄: [皮肤]}
+            champion_names: {英雄英文名: 中文名}
+        """
+        champion_names = champion_names or {}
+        changed = 0
+        with self.lock:
+            for champion in [c for c in self.by_champion if c not in skins_data]:
+                self._remove_champion(champion)
+                changed += 1
+            for champion, skins in skins_data.items():
+                name = champion_names.get(champion)
+                current = self.by_champion.get(champion)
+                if current == skins and (not current or self.docs[str(current[0]["id"])]["championName"] == name):
+                    continue
+                self.update_champion(champion, skins, name)
+                changed += 1
+        return changed
+
+    def _prefix_docs(self, term):
+        """以term为前缀的所有词对应的文档，返回 {皮肤id: 是否完全匹配}"""
+        matched = {}
+        start = bisect.bisect_left(self.sorted_tokens, term)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(term):
+                break
+            exact = token == term
+            for doc_id in self.token_docs[token]:
+                matched[doc_id] = matched.get(doc_id, False) or exact
+        return matched
+
+    def _rank(self, doc_id, terms):
+        name_tokens, _ = self.doc_tokens[doc_id]
+        # 命中皮肤名的结果优先于只命中英雄名的结果，名称越短越靠前
+        in_name = sum(1 for term in terms if any(token.startswith(term) for token in name_tokens))
+        return (-in_name, len(self.docs[doc_id]["skin"]))
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """搜索皮肤，所有词都需要前缀匹配；无结果时进行模糊匹配"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self.lock:
+            result = None
+            exact = {}
+            for term in terms:
+                matched = self._prefix_docs(term)
+                result = set(matched) if result is None else result & set(matched)
+                for doc_id, is_exact in matched.items():
+                    exact[doc_id] = exact.get(doc_id, 0) + is_exact
+                if not result:
+                    break
+            if result:
+                ranked = sorted(result, key=lambda d: (-exact.get(d, 0),) + self._rank(d, terms))
+                return [dict(self.docs[d], fuzzy=False) for d in ranked[:limit]]
+
+            # 模糊匹配：统计每个文档命中的查询三元组数量
+            grams = set()
+            for term in terms:
+                grams |= trigrams(term)
+            counts = {}
+            for gram in grams:
+                for doc_id in self.gram_docs.get(gram, ()):
+                    counts[doc_id] = counts.get(doc_id, 0) + 1
+            threshold = max(1, FUZZY_THRESHOLD * len(grams))
+            candidates = [d for d, count in counts.items() if count >= threshold]
+            ranked = sorted(candidates, key=lambda d: (-counts[d],) + self._rank(d, terms))
+            return [dict(self.docs[d], fuzzy=True) for d in ranked[:limit]]
+
+    def stats(self):
+        with self.lock:
+            return {"skins": len(self.docs), "champions": len(self.by_champion), "tokens": len(self.sorted_tokens)}
@@ -0,0 +1,202 @@
+import os
+import logging
+import threading
+import webbrowser
+from game_api import GameAPI
+from game_stats import GameStats
+from phase_scheduler import PhaseScheduler
+from lobby_prefetcher import LobbyPrefetcher
+from champion_monitor import ChampionMonitor
+from match_store import MatchStore
+from history_crawler import HistoryCrawler, HistoryStore
+from lcu_discovery import LcuDiscovery, game_dir
+from tools import modTools
+
+# 扫描新客户端的间隔(秒)，客户端没有变化时逐步加倍到上限
+SESSION_SCAN_INTERVAL = 5
+SESSION_SCAN_MAX_INTERVAL = 30
+# 每个会话的常驻任务数: 阶段调度器、战绩同步、大厅预取、overlay
+TASKS_PER_SESSION = 4
+
+
+def dir_key(path):
+    """客户端目录的比较键，同一个客户端从命令行和lockfile得到的路径写法可能不同"""
+    return os.path.normcase(os.path.normpath(path)) if path else None
+
+
+class ClientSession:
+    """单个LCU客户端的会话
+
+    每个客户端有自己的连接、阶段调度器、战绩状态、当前英雄和mod工具(游戏目录与overlay任务)，
+    皮肤目录、图片缓存和对局详情缓存由所有会话共享。
+    """
+
+    def __init__(self, session_id, game_api, supervisor, web_server, skin_dict, match_store, history_store):
+        self.id = session_id
+        self.game_api = game_api
+        self.supervisor = supervisor
+        self.web_server = web_server
+        self.current_champion = None
+        self.available_skins = []
+        # 皮肤注入到本客户端的游戏目录，overlay任务按会话命名，不会取消其他客户端的overlay
+        self.modtools = modTools(supervisor, web_server.zip_index, game_path=game_dir(self.install_dir) or None,
+                                 name=f"overlay:{session_id}")
+        self.game_stats = GameStats(game_api, match_store, supervisor)
+        self.scheduler = PhaseScheduler(game_api, supervisor, name=f"phase_scheduler:{session_id}")
+        self.crawler = HistoryCrawler(game_api, supervisor, history_store, name=f"history_crawler:{session_id}")
+        # 对局结束后清空战绩缓存，并把新对局同步到本地历史
+        self.scheduler.on_enter("EndOfGame", self.game_stats.invalidate_match_cache)
+        self.scheduler.on_enter("EndOfGame", lambda old, new: self.crawler.start())
+        self.prefetcher = LobbyPrefetcher(self.game_stats, supervisor, name=f"lobby_prefetch:{session_id}")
+        # 监控把英雄变化写入本会话，而不是全局的Web服务器状态
+        self.monitor = ChampionMonitor(game_api, self, skin_dict, self.scheduler, self.prefetcher)
+
+    @property
+    def install_dir(self):
+        return self.game_api.credentials.install_dir if self.game_api.credentials else None
+
+    def start(self):
+        self.monitor.start_monitoring()
+        self.crawler.start()
+
+    def stop(self):
+        self.crawler.cancel()
+        self.prefetcher.cancel()
+        self.supervisor.cancel(self.modtools.name)
+        self.monitor.stop_monitoring()
+        self.scheduler.stop()
+
+    def update_champion_data(self, champion, skins):
+        """更新本会话的当前英雄和可用皮肤"""
+        self.current_champion = champion
+        self.available_skins = skins
+        self.web_server.warm_champion(champion, skins)
+        logging.info(f"会话 {self.id} 已更新英雄数据: {champion}, 皮肤数量: {len(skins)}")
+
+    def open_browser(self):
+        """打开本会话的Web页面"""
+        webBrowser = webbrowser.get(using='windows-default')
+        webBrowser.open(f"http://127.0.0.1:{self.web_server.port}/?session={self.id}")
+        logging.info(f"已为会话 {self.id} 打开浏览器")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "summonerId": self.game_api.summoner_id,
+            "installDir": self.install_dir,
+            "phase": self.scheduler.phase,
+            "history": self.crawler.status,
+            "champion": self.current_champion
+        }
+
+
+class SessionManager:
+    """管理同一进程内的多个LCU客户端会话
+
+    第一个会话使用启动时发现的客户端，之后定期扫描进程，
+    新出现的客户端自动创建会话，已关闭的客户端移除会话。
+    """
+
+    def __init__(self, supervisor, web_server, skin_dict):
+        self.supervisor = supervisor
+        self.web_server = web_server
+        self.skin_dict = skin_dict
+        self.history_store = HistoryStore()
+        self.match_store = MatchStore(store=self.history_store)
+        self.discovery = LcuDiscovery()
+        self.sessions = {}
+        self.default_id = None
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def add(self, game_api):
+        """为一个客户端连接创建并启动会话"""
+        with self.lock:
+            session_id = str(self.next_id)
+            self.next_id += 1
+        # 会话的常驻任务不占全局名额，客户端数量增加时不会触发任务上限
+        self.supervisor.reserve(TASKS_PER_SESSION)
+        session = None
+        try:
+            session = ClientSession(session_id, game_api, self.supervisor, self.web_server, self.skin_dict,
+                                    self.match_store, self.history_store)
+            session.start()
+        except Exception:
+            # 启动了一半的任务一并停止，失败的会话不登记，也不会成为默认会话
+            if session:
+                session.stop()
+            self.supervisor.release(TASKS_PER_SESSION)
+            raise
+        with self.lock:
+            self.sessions[session_id] = session
+            if self.default_id is None:
+                self.default_id = session_id
+        logging.info(f"已创建客户端会话 {session_id}: {session.install_dir}")
+        return session
+
+    def remove(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session:
+            session.stop()
+            self.supervisor.release(TASKS_PER_SESSION)
+            logging.info(f"客户端会话 {session_id} 已关闭")
+
+    def get(self, session_id=None):
+        """按id获取会话，未指定或不存在时返回默认会话"""
+        with self.lock:
+            return self.sessions.get(session_id) or self.sessions.get(self.default_id)
+
+    def list(self):
+        with self.lock:
+            return list(self.sessions.values())
+
+    def scan(self):
+        """发现新启动的客户端，移除已关闭的客户端，返回会话是否有变化"""
+        changed = False
+        clients = self.discovery.discover_all()
+        known = {dir_key(session.install_dir): session for session in self.list()}
+        alive = {dir_key(credentials.install_dir) for credentials in clients}
+        for credentials in clients:
+            if dir_key(credentials.install_dir) in known:
+                continue
+            try:
+                known[dir_key(credentials.install_dir)] = self.add(GameAPI(credentials))
+                changed = True
+            except Exception as e:
+                logging.error(f"连接客户端失败 {credentials.install_dir}: {e}")
+        # 默认会话保留，由其自身的重连逻辑处理客户端重启
+        for install_dir, session in known.items():
+            if install_dir not in alive and session.id != self.default_id:
+                self.remove(session.id)
+                changed = True
+        return changed
+
+    def lockfiles_changed(self):
+        """已有会话的lockfile是否消失，只检查文件，不遍历进程"""
+        return any(session.install_dir and not os.path.exists(os.path.join(session.install_dir, "lockfile"))
+                   for session in self.list() if session.id != self.default_id)
+
+    def _run(self, task):
+        # 会话稳定时拉长完整的进程扫描间隔，期间只检查已有客户端的lockfile
+        interval = SESSION_SCAN_INTERVAL
+        while not task.cancelled():
+            try:
+                changed = self.scan()
+            except Exception as e:
+                logging.error(f"扫描客户端时出错: {e}")
+                changed = False
+            interval = SESSION_SCAN_INTERVAL if changed else min(interval * 2, SESSION_SCAN_MAX_INTERVAL)
+            waited = 0
+            while waited < interval and not task.stop_event.wait(SESSION_SCAN_INTERVAL):
+                waited += SESSION_SCAN_INTERVAL
+                if self.lockfiles_changed():
+                    break
+
+    def start(self):
+        return self.supervisor.spawn("session_manager", self._run, restart="on-failure", order=25)
+
+    def stop(self):
+        for session in self.list():
+            session.stop()
+        self.supervisor.cancel("session_manager")
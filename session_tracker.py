@@ -0,0 +1,157 @@
+import logging
+import threading
+
+
+class SessionDiff:
+    """两次英雄选择会话快照之间的差异"""
+
+    def __init__(self, joined=None, left=None, changed=None, reset=False):
+        self.joined = joined or []    # 新加入的成员key
+        self.left = left or []        # 离开的成员key
+        self.changed = changed or {}  # {成员key: {字段: (旧值, 新值)}}
+        self.reset = reset            # 是否是新的房间
+
+    @property
+    def is_empty(self):
+        return not self.joined and not self.left and not self.changed
+
+    def to_dict(self):
+        return {
+            "joined": self.joined,
+            "left": self.left,
+            "changed": {k: {f: list(v) for f, v in c.items()} for k, c in self.changed.items()},
+            "reset": self.reset
+        }
+
+
+class SessionTracker:
+    """英雄选择会话跟踪器
+
+    保存上一次的会话快照，计算成员加入/离开、英雄和位置变化，
+    未变化成员的玩家信息和战绩结果直接复用，后续工作量只和变化的部分成正比。
+    """
+
+    # 快照中参与比较的字段
+    TRACKED_FIELDS = ("championId", "position")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.session_id = None
+        self.members = {}    # {成员key: 快照}
+        self.players = {}    # {成员key: 玩家信息}
+        self.histories = {}  # {(summonerId, mode, count): 战绩列表}
+
+    @staticmethod
+    def member_key(member):
+        """成员的唯一标识，优先使用puuid"""
+        return member.get("puuid") or str(member.get("summonerId") or "") or f"cell-{member.get('cellId')}"
+
+    @staticmethod
+    def snapshot(member):
+        """提取成员快照"""
+        return {
+            "summonerId": member.get("summonerId"),
+            "puuid": member.get("puuid"),
+            "summonerName": member.get("summonerName"),
+            "cellId": member.get("cellId"),
+            "championId": member.get("championId"),
+            "position": member.get("assignedPosition", "未知")
+        }
+
+    def reset(self):
+        """清空所有快照和缓存"""
+        with self.lock:
+            self.session_id = None
+            self.members.clear()
+            self.players.clear()
+            self.histories.clear()
+
+    def update(self, session):
+        """用新的会话数据更新快照并返回差异
+
+        Args:
+            session: /lol-champ-select/v1/session 的返回，None表示不在英雄选择中
+        """
+        with self.lock:
+            if session is None:
+                diff = SessionDiff(left=list(self.members.keys()), reset=bool(self.members))
+                self.reset()
+                return diff
+
+            reset = False
+            session_id = session.get("gameId") or session.get("id")
+            if session_id != self.session_id:
+                if self.members:
+                    logging.info("检测到新的英雄选择房间，重置会话缓存")
+                self.reset()
+                self.session_id = session_id
+                reset = True
+
+            current = {}
+            for member in session.get("myTeam", []):
+                current[self.member_key(member)] = self.snapshot(member)
+
+            joined = [k for k in current if k not in self.members]
+            left = [k for k in self.members if k not in current]
+            changed = {}
+            for key in current:
+                if key not in self.members:
+                    continue
+                fields = {
+                    f: (self.members[key][f], current[key][f])
+                    for f in self.TRACKED_FIELDS
+                    if self.members[key][f] != current[key][f]
+                }
+                if fields:
+                    changed[key] = fields
+
+            # 离开的成员丢弃其缓存
+            for key in left:
+                self.players.pop(key, None)
+                summoner_id = str(self.members[key].get("summonerId"))
+                for history_key in [h for h in self.histories if h[0] == summoner_id]:
+                    del self.histories[history_key]
+            # 变化的成员只更新变化字段，身份无需重新解析
+            for key, fields in changed.items():
+                if key in self.players:
+                    for f, (_, new) in fields.items():
+                        self.players[key][f] = new
+
+            self.members = current
+            diff = SessionDiff(joined, left, changed, reset)
+            if not diff.is_empty:
+                logging.debug(f"英雄选择会话变化: {diff.to_dict()}")
+            return diff
+
+    def get_members(self):
+        """当前快照中的成员 [(key, 快照)]"""
+        with self.lock:
+            return list(self.members.items())
+
+    def get_player(self, key):
+        with self.lock:
+            return self.players.get(key)
+
+    def set_player(self, key, player):
+        with self.lock:
+            if key in self.members:
+                self.players[key] = player
+
+    def get_history(self, summoner_id, mode, count, loader):
+        """获取战绩，未变化成员直接复用缓存
+
+        空战绩也会缓存，没有该模式对局的成员不会在每轮预取时重新翻页。
+        召唤师ID统一按字符串比较，自己的ID是字符串而房间成员的是整数。
+
+        Args:
+            loader: 缓存未命中时调用的函数，返回战绩列表
+        """
+        history_key = (str(summoner_id), mode or 'ALL', count)
+        with self.lock:
+            if history_key in self.histories:
+                return self.histories[history_key]
+        history = loader()
+        if history is not None:
+            with self.lock:
+                self.histories[history_key] = history
+        return history
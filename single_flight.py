@@ -0,0 +1,69 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.owner = threading.get_ident()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """合并相同key的并发调用
+
+    同一个key正在执行时，后来的调用不再重复执行，而是等待并共享第一个调用的结果或异常；
+    执行结束后立即移除，不做结果缓存。
+    执行中的调用在同一线程内再次以相同key调用时直接执行，不等待自己，避免死锁。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            reentrant = call is not None and call.owner == threading.get_ident()
+            if reentrant:
+                self.executed += 1
+            elif call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if reentrant:
+            return func()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self.lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "inFlight": len(self.calls),
+                "coalesceRate": round(self.coalesced / total, 3) if total else 0
+            }
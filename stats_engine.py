@@ -0,0 +1,171 @@
+import logging
+import numpy as np
+
+# KDA分布的分桶边界
+KDA_BINS = [0, 1, 2, 3, 4, 5, 7, 10, np.inf]
+
+
+class StatsEngine:
+    """基于NumPy列式存储的玩家战绩聚合引擎
+
+    输入为 GameStats.get_player_match_history 产出的对局记录，
+    可选地结合 GameStats.get_match_detail 的对局详情计算伤害占比和经济占比。
+    所有玩家的数据放进同一组列里，分组统计通过 bincount 一次完成，避免逐条字典循环。
+    """
+
+    def __init__(self, records_by_player, details=None):
+        """构建列式数据
+
+        Args:
+            records_by_player: {玩家标识: [对局记录, ...]}，玩家标识一般为summonerId
+            details: {gameId: 对局详情}，可选，用于计算伤害占比和经济占比
+        """
+        self.players = list(records_by_player.keys())
+        details = details or {}
+
+        player_codes = []
+        kills = []
+        deaths = []
+        assists = []
+        wins = []
+        queue_ids = []
+        champions = []
+        damage_share = []
+        gold_share = []
+        for code, player in enumerate(self.players):
+            for record in records_by_player[player] or []:
+                player_codes.append(code)
+                kills.append(record.get("kills", 0))
+                deaths.append(record.get("deaths", 0))
+                assists.append(record.get("assists", 0))
+                wins.append(bool(record.get("win", False)))
+                queue_ids.append(record.get("queueId", 0))
+                champions.append(record.get("championName") or "未知英雄")
+                damage, gold = self._lookup_share(details.get(record.get("gameId")), player)
+                damage_share.append(damage)
+                gold_share.append(gold)
+
+        self.player = np.asarray(player_codes, dtype=np.int32)
+        self.kills = np.asarray(kills, dtype=np.float64)
+        self.deaths = np.asarray(deaths, dtype=np.float64)
+        self.assists = np.asarray(assists, dtype=np.float64)
+        self.win = np.asarray(wins, dtype=bool)
+        self.queue_id = np.asarray(queue_ids, dtype=np.int64)
+        self.champion_names, self.champion = np.unique(np.asarray(champions, dtype=str), return_inverse=True)
+        self.champion = self.champion.astype(np.int64)
+        self.damage_share = np.asarray(damage_share, dtype=np.float64)
+        self.gold_share = np.asarray(gold_share, dtype=np.float64)
+        self.kda = (self.kills + self.assists) / np.maximum(self.deaths, 1)
+
+    @staticmethod
+    def _lookup_share(detail, player):
+        """从对局详情中取出玩家的伤害占比和经济占比，缺失时为NaN"""
+        if not detail:
+            return np.nan, np.nan
+        for participant in detail.get("participants", []):
+            if str(participant.get("summonerId")) == str(player):
+                return participant.get("damageRatio", np.nan), participant.get("goldRatio", np.nan)
+        return np.nan, np.nan
+
+    def _group(self, keys, size):
+        """按组统计场次、胜场和KDA总和"""
+        games = np.bincount(keys, minlength=size)
+        wins = np.bincount(keys, weights=self.win, minlength=size)
+        kda_sum = np.bincount(keys, weights=self.kda, minlength=size)
+        return games, wins, kda_sum
+
+    def aggregate(self):
+        """计算所有玩家的聚合数据
+
+        Returns:
+            dict: {玩家标识: 聚合结果}
+        """
+        n_players = len(self.players)
+        result = {}
+        if n_players == 0:
+            return result
+
+        # 玩家整体
+        games, wins, _ = self._group(self.player, n_players)
+
+        # 按队列分组，组合键 = 玩家 * 队列数 + 队列下标
+        queue_values, queue_index = np.unique(self.queue_id, return_inverse=True)
+        n_queues = len(queue_values)
+        queue_games, queue_wins, _ = self._group(self.player * n_queues + queue_index, n_players * n_queues)
+        queue_games = queue_games.reshape(n_players, n_queues)
+        queue_wins = queue_wins.reshape(n_players, n_queues)
+
+        # 按英雄分组
+        n_champions = len(self.champion_names)
+        champ_games, champ_wins, champ_kda = self._group(self.player * n_champions + self.champion, n_players * n_champions)
+        champ_games = champ_games.reshape(n_players, n_champions)
+        champ_wins = champ_wins.reshape(n_players, n_champions)
+        champ_kda = champ_kda.reshape(n_players, n_champions)
+
+        # 按玩家排序后切片，用于KDA分布和占比统计
+        order = np.argsort(self.player, kind="stable")
+        bounds = np.searchsorted(self.player[order], np.arange(n_players + 1))
+        kda_sorted = self.kda[order]
+        damage_sorted = self.damage_share[order]
+        gold_sorted = self.gold_share[order]
+
+        for code, player in enumerate(self.players):
+            n = int(games[code])
+            if n == 0:
+                result[player] = {"games": 0}
+                continue
+            kda = kda_sorted[bounds[code]:bounds[code + 1]]
+            p25, median, p75 = np.percentile(kda, [25, 50, 75])
+            histogram, _ = np.histogram(kda, bins=KDA_BINS)
+
+            queue_mask = queue_games[code] > 0
+            queues = [
+                {
+                    "queueId": int(q),
+                    "games": int(g),
+                    "winRate": round(float(w / g), 3)
+                }
+                for q, g, w in zip(queue_values[queue_mask], queue_games[code][queue_mask], queue_wins[code][queue_mask])
+            ]
+
+            champ_mask = np.flatnonzero(champ_games[code])
+            champ_mask = champ_mask[np.argsort(-champ_games[code][champ_mask], kind="stable")]
+            champions = [
+                {
+                    "championName": str(self.champion_names[c]),
+                    "games": int(champ_games[code][c]),
+                    "winRate": round(float(champ_wins[code][c] / champ_games[code][c]), 3),
+                    "kda": round(float(champ_kda[code][c] / champ_games[code][c]), 2)
+                }
+                for c in champ_mask
+            ]
+
+            result[player] = {
+                "games": n,
+                "wins": int(wins[code]),
+                "winRate": round(float(wins[code] / n), 3),
+                "queues": queues,
+                "kda": {
+                    "mean": round(float(kda.mean()), 2),
+                    "median": round(float(median), 2),
+                    "p25": round(float(p25), 2),
+                    "p75": round(float(p75), 2),
+                    "histogram": {
+                        "bins": [b if np.isfinite(b) else None for b in KDA_BINS],
+                        "counts": histogram.tolist()
+                    }
+                },
+                "champions": champions,
+                "damageShare": self._share_summary(damage_sorted[bounds[code]:bounds[code + 1]]),
+                "goldShare": self._share_summary(gold_sorted[bounds[code]:bounds[code + 1]])
+            }
+        logging.debug(f"已聚合 {n_players} 名玩家共 {len(self.player)} 场对局")
+        return result
+
+    @staticmethod
+    def _share_summary(values):
+        """统计占比的均值，忽略缺失值"""
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return {"mean": None, "samples": 0}
+        return {"mean": round(float(values.mean()), 3), "samples": int(len(values))}
@@ -0,0 +1,165 @@
+import json
+import logging
+import threading
+import urllib.parse
+from lcu_governor import PRIORITY_BACKGROUND
+
+
+class SummonerResolver:
+    """召唤师身份解析器
+
+    批量解析 summonerId / puuid 并在会话内缓存 id、puuid、显示名称之间的双向映射，
+    解析整个英雄选择房间只需要一到两次LCU调用，重复查询直接命中缓存。
+    """
+
+    def __init__(self, game_api):
+        """初始化解析器
+
+        Args:
+            game_api: GameAPI实例，用于获取LCU API的基础URL
+        """
+        self.game_api = game_api
+        self.lock = threading.Lock()
+        self.by_id = {}
+        self.by_puuid = {}
+
+    @staticmethod
+    def is_valid_puuid(puuid):
+        """检查PUUID格式是否有效，防止Invalid URI Format错误"""
+        return bool(puuid) and '-' in puuid and len(puuid) >= 30
+
+    @staticmethod
+    def display_name(summoner_info):
+        """从召唤师信息中取出显示名称"""
+        if not summoner_info:
+            return None
+        if summoner_info.get("displayName"):
+            return summoner_info["displayName"]
+        if summoner_info.get("gameName") and summoner_info.get("tagLine"):
+            return f"{summoner_info['gameName']}#{summoner_info['tagLine']}"
+        return None
+
+    def _store(self, summoner_info):
+        """写入缓存"""
+        if not summoner_info:
+            return
+        with self.lock:
+            summoner_id = summoner_info.get("summonerId")
+            puuid = summoner_info.get("puuid")
+            if summoner_id:
+                self.by_id[str(summoner_id)] = summoner_info
+            if puuid:
+                self.by_puuid[puuid] = summoner_info
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.by_id.clear()
+            self.by_puuid.clear()
+
+    def resolve_ids(self, summoner_ids):
+        """批量解析summonerId
+
+        Returns:
+            dict: {summonerId(str): 召唤师信息}
+        """
+        ids = {str(i) for i in summoner_ids if i and str(i) != "0"}
+        with self.lock:
+            missing = [i for i in ids if i not in self.by_id]
+        if missing:
+            try:
+                response = self.game_api.get(
+                    "/lol-summoner/v2/summoners",
+                    params={"ids": json.dumps([int(i) for i in missing])},
+                    priority=PRIORITY_BACKGROUND
+                )
+                if response.status_code == 200:
+                    for summoner_info in response.json():
+                        self._store(summoner_info)
+                else:
+                    logging.debug(f"批量获取召唤师信息失败: {response.status_code}")
+            except Exception as e:
+                logging.error(f"批量获取召唤师信息时出错: {e}")
+            # 批量接口未返回的再逐个查询
+            with self.lock:
+                missing = [i for i in missing if i not in self.by_id]
+            for summoner_id in missing:
+                self._store(self._fetch_one(f"/lol-summoner/v1/summoners/{summoner_id}"))
+        with self.lock:
+            return {i: self.by_id[i] for i in ids if i in self.by_id}
+
+    def resolve_puuids(self, puuids):
+        """批量解析puuid
+
+        Returns:
+            dict: {puuid: 召唤师信息}
+        """
+        valid = set()
+        for puuid in puuids:
+            if self.is_valid_puuid(puuid):
+                valid.add(puuid)
+            elif puuid:
+                logging.warning(f"无效的PUUID格式: {puuid}")
+        with self.lock:
+            missing = [p for p in valid if p not in self.by_puuid]
+        if missing:
+            try:
+                response = self.game_api.post("/lol-summoner/v2/summoners/puuid", json=missing, priority=PRIORITY_BACKGROUND)
+                if response.status_code == 200:
+                    for summoner_info in response.json():
+                        self._store(summoner_info)
+                else:
+                    logging.debug(f"批量获取召唤师信息失败: {response.status_code}")
+            except Exception as e:
+                logging.error(f"批量获取召唤师信息时出错: {e}")
+            with self.lock:
+                missing = [p for p in missing if p not in self.by_puuid]
+            for puuid in missing:
+                encoded_puuid = urllib.parse.quote(puuid)
+                self._store(self._fetch_one(f"/lol-summoner/v1/summoners/by-puuid/{encoded_puuid}"))
+        with self.lock:
+            return {p: self.by_puuid[p] for p in valid if p in self.by_puuid}
+
+    def _fetch_one(self, path):
+        """单个查询，作为批量接口的兜底"""
+        try:
+            response = self.game_api.get(path, priority=PRIORITY_BACKGROUND)
+            if response.status_code == 200:
+                return response.json()
+            logging.debug(f"获取召唤师信息失败: {response.status_code} - {response.text}")
+        except Exception as e:
+            logging.error(f"获取召唤师信息时出错: {e}")
+        return None
+
+    def get_by_id(self, summoner_id):
+        """根据summonerId获取召唤师信息"""
+        return self.resolve_ids([summoner_id]).get(str(summoner_id))
+
+    def get_by_puuid(self, puuid):
+        """根据puuid获取召唤师信息"""
+        return self.resolve_puuids([puuid]).get(puuid)
+
+    def get_puuid(self, summoner_id):
+        """根据summonerId获取puuid"""
+        summoner_info = self.get_by_id(summoner_id)
+        return summoner_info.get("puuid") if summoner_info else None
+
+    def resolve_members(self, members):
+        """解析英雄选择房间成员，优先按puuid批量解析，其余按summonerId批量解析
+
+        Args:
+            members: 含有 puuid / summonerId 字段的成员列表
+
+        Returns:
+            list: 与members一一对应的召唤师信息，无法解析的为None
+        """
+        by_puuid = self.resolve_puuids([m.get("puuid") for m in members])
+        pending_ids = [
+            m.get("summonerId") for m in members
+            if m.get("puuid") not in by_puuid and m.get("summonerId")
+        ]
+        by_id = self.resolve_ids(pending_ids) if pending_ids else {}
+        return [
+            by_puuid.get(m.get("puuid")) or by_id.get(str(m.get("summonerId")))
+            for m in members
+        ]
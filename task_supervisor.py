@@ -0,0 +1,208 @@
+import sys
+import time
+import atexit
+import signal
+import logging
+import threading
+import subprocess
+import psutil
+from concurrent.futures import ThreadPoolExecutor
+
+# 短任务共享线程池大小
+MAX_WORKERS = 8
+# 后台LCU请求(大厅预取、历史战绩抓取)线程池大小，与前台请求的线程池分开
+MAX_BACKGROUND_WORKERS = 4
+# 全局常驻任务数量上限，每个客户端会话的任务另行预留
+MAX_TASKS = 16
+# 重启退避上限(秒)
+MAX_RESTART_BACKOFF = 30
+# 关闭时的总等待时间(秒)
+SHUTDOWN_TIMEOUT = 0.8
+
+
+class SupervisedTask:
+    """由 TaskSupervisor 管理的常驻任务"""
+
+    def __init__(self, name, target, restart, max_restarts, order, on_cancel):
+        self.name = name
+        self.target = target
+        self.on_cancel = on_cancel
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.order = order
+        self.restarts = 0
+        self.stop_event = threading.Event()
+        self.processes = []
+        self.thread = None
+
+    def is_alive(self):
+        return bool(self.thread) and self.thread.is_alive()
+
+    def cancelled(self):
+        return self.stop_event.is_set()
+
+
+class TaskSupervisor:
+    """统一管理所有后台任务
+
+    常驻任务各占一个具名线程，同名任务重新启动时先取消旧任务，线程数量不会随会话增长；
+    短任务统一提交到有界线程池，批量的后台请求使用单独的线程池，不会占满前台请求的线程。
+    任务可以登记子进程，取消或关闭时一并终止。
+    关闭时按 order 从大到小依次停止，整体在一秒内完成。
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_tasks=MAX_TASKS, background_workers=MAX_BACKGROUND_WORKERS):
+        self.max_tasks = max_tasks
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="worker")
+        self.background = ThreadPoolExecutor(max_workers=background_workers, thread_name_prefix="background")
+        self.tasks = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        atexit.register(self.shutdown)
+
+    def spawn(self, name, target, restart="never", max_restarts=3, order=0, on_cancel=None):
+        """启动常驻任务，同名任务已存在时先取消
+
+        Args:
+            name: 任务名称
+            target: target(task)，应定期检查 task.cancelled()
+            restart: 重启策略 never / on-failure / always
+            max_restarts: 最多重启次数
+            order: 关闭顺序，数值大的先停止
+            on_cancel: 取消时额外调用的函数，用于打断阻塞中的任务
+        """
+        if self.closed:
+            raise RuntimeError("任务管理器已关闭")
+        self.cancel(name)
+        with self.lock:
+            if len(self.tasks) >= self.max_tasks:
+                raise RuntimeError(f"常驻任务数量超过上限 {self.max_tasks}")
+            task = SupervisedTask(name, target, restart, max_restarts, order, on_cancel)
+            task.thread = threading.Thread(target=self._run, args=(task,), name=name)
+            task.thread.daemon = True
+            self.tasks[name] = task
+        task.thread.start()
+        logging.debug(f"已启动任务: {name}")
+        return task
+
+    def reserve(self, count):
+        """为一组按需创建的常驻任务(如一个客户端会话)预留名额，上限随之提高"""
+        with self.lock:
+            self.max_tasks += count
+
+    def release(self, count):
+        """归还 reserve 预留的名额"""
+        with self.lock:
+            self.max_tasks -= count
+
+    def submit(self, fn, *args, **kwargs):
+        """提交短任务到共享线程池"""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def submit_background(self, fn, *args, **kwargs):
+        """提交批量的后台请求到单独的线程池"""
+        return self.background.submit(fn, *args, **kwargs)
+
+    def get(self, name):
+        with self.lock:
+            return self.tasks.get(name)
+
+    def track_process(self, task, process):
+        """登记任务启动的子进程"""
+        task.processes.append(process)
+        return process
+
+    def _run(self, task):
+        while True:
+            failed = False
+            try:
+                task.target(task)
+            except Exception as e:
+                failed = True
+                logging.error(f"任务 {task.name} 异常退出: {e}")
+            if task.cancelled():
+                break
+            should_restart = task.restart == "always" or (task.restart == "on-failure" and failed)
+            if not should_restart or task.restarts >= task.max_restarts:
+                break
+            task.restarts += 1
+            backoff = min(2 ** task.restarts, MAX_RESTART_BACKOFF)
+            logging.info(f"任务 {task.name} 将在 {backoff} 秒后第 {task.restarts} 次重启")
+            if task.stop_event.wait(backoff):
+                break
+        with self.lock:
+            if self.tasks.get(task.name) is task:
+                del self.tasks[task.name]
+
+    def cancel(self, name, timeout=1.0):
+        """取消任务并终止其登记的子进程"""
+        with self.lock:
+            task = self.tasks.pop(name, None)
+        if not task:
+            return False
+        task.stop_event.set()
+        if task.on_cancel:
+            try:
+                task.on_cancel()
+            except Exception as e:
+                logging.error(f"取消任务 {name} 时出错: {e}")
+        self._terminate_processes(task.processes, timeout / 2)
+        if task.thread is not threading.current_thread():
+            task.thread.join(timeout=timeout / 2)
+        logging.debug(f"已取消任务: {name}")
+        return True
+
+    @staticmethod
+    def _terminate_processes(processes, timeout):
+        """终止进程及其子进程，超时后强制结束"""
+        procs = []
+        for process in processes:
+            pid = process.pid if isinstance(process, subprocess.Popen) else process
+            try:
+                parent = psutil.Process(pid)
+                procs.extend(parent.children(recursive=True))
+                procs.append(parent)
+            except psutil.NoSuchProcess:
+                pass
+        for proc in procs:
+            try:
+                proc.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        gone, alive = psutil.wait_procs(procs, timeout=timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """按顺序停止所有任务并清理所有子进程"""
+        if self.closed:
+            return
+        self.closed = True
+        logging.info("正在关闭所有后台任务...")
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            tasks = sorted(self.tasks.values(), key=lambda t: -t.order)
+        for task in tasks:
+            remaining = max(0.05, deadline - time.monotonic())
+            self.cancel(task.name, timeout=min(remaining, timeout / 2))
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.background.shutdown(wait=False, cancel_futures=True)
+        # 兜底清理未登记的子进程
+        try:
+            children = psutil.Process().children(recursive=True)
+            self._terminate_processes([c.pid for c in children], max(0.05, deadline - time.monotonic()))
+        except Exception as e:
+            logging.error(f"清理进程时出错: {e}")
+
+    def install_signal_handlers(self):
+        """注册终止信号处理"""
+        def signal_handler(signum, frame):
+            logging.info("收到终止信号，正在清理...")
+            self.shutdown()
+            sys.exit(0)
+
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
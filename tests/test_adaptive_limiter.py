@@ -0,0 +1,51 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import adaptive_limiter
+from adaptive_limiter import AdaptiveLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+
+def test_sustained_failures_reach_the_floor(monkeypatch):
+    monkeypatch.setattr(adaptive_limiter.requests, "get", lambda url, **kwargs: FakeResponse(429))
+    limiter = AdaptiveLimiter(initial=8, min_limit=2)
+    for _ in range(30):
+        assert limiter.get("http://example.invalid", retries=1) is None
+    assert limiter.limit == 2
+    assert limiter.stats()["failures"] == 30
+
+
+def test_concurrent_failures_halve_once():
+    limiter = AdaptiveLimiter(initial=8, min_limit=2)
+    for _ in range(8):
+        limiter.acquire()
+    # 同一批在途请求一起失败，只算一次拥塞
+    for _ in range(8):
+        limiter.release(False, 0.1)
+    assert limiter.limit == 4
+
+
+def test_unexpected_error_releases_slot(monkeypatch):
+    def broken(url, **kwargs):
+        raise ValueError("bad url")
+
+    monkeypatch.setattr(adaptive_limiter.requests, "get", broken)
+    limiter = AdaptiveLimiter(initial=2, min_limit=1)
+    for _ in range(3):
+        try:
+            limiter.get("http://example.invalid", retries=1)
+        except ValueError:
+            pass
+    assert limiter.in_flight == 0
+    # 名额没有泄漏，后续请求不会阻塞
+    acquired = threading.Event()
+    threading.Thread(target=lambda: (limiter.acquire(), acquired.set()), daemon=True).start()
+    assert acquired.wait(1)
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compression
+from compression import negotiate
+
+
+def test_negotiate_honors_q_values(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("br;q=0, gzip") == "gzip"
+    assert negotiate("gzip;q=0, br;q=0") is None
+    assert negotiate("br;q=0.5, gzip;q=0.8") == "gzip"
+    assert negotiate("*;q=0.1, br;q=0") == "gzip"
+    # 子串匹配会把 "brotli-x" 误认为 br
+    assert negotiate("brotli-x") is None
+    assert negotiate("") is None and negotiate(None) is None
+
+
+def test_negotiate_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate("br, gzip;q=0.5") == "gzip"
+    assert negotiate("br") is None
@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import game_api
+from game_api import GameAPI
+from lcu_discovery import LcuCredentials
+from single_flight import SingleFlight
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class RestartingClient:
+    """模拟重启的客户端：旧端口的请求全部连接失败，新端口正常返回"""
+
+    def __init__(self, old_port, new_port):
+        self.old_port = old_port
+        self.new_port = new_port
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(url)
+        if f":{self.old_port}/" in url and len(self.calls) > 1:
+            raise requests.exceptions.ConnectionError("connection refused")
+        return FakeResponse(200, {"summonerId": 42})
+
+
+def test_single_flight_runs_same_thread_reentry_inline():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: flight.do("key", lambda: 7) + 1) == 8
+
+
+def test_reconnect_started_by_current_summoner_get_does_not_hang(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "champion.json").write_text("[]", encoding="utf-8")
+    client = RestartingClient("1111", "2222")
+    monkeypatch.setattr(game_api.requests, "request", client.request)
+
+    api = GameAPI(LcuCredentials("1111", "old", install_dir=str(tmp_path)))
+    restarted = LcuCredentials("2222", "new", install_dir=str(tmp_path))
+    monkeypatch.setattr(api.discovery, "read_lockfile", lambda install_dir: restarted)
+
+    result = {}
+
+    def fetch():
+        result["res"] = api.get("/lol-summoner/v1/current-summoner")
+
+    thread = threading.Thread(target=fetch, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "重连时获取召唤师ID不应等待自己发起的请求"
+    assert result["res"].json() == {"summonerId": 42}
+    assert api.url == restarted.url
+    assert api.summoner_id == "42"
+    # 重连后锁已释放，后续重连不会阻塞
+    assert api.reconnect_lock.acquire(timeout=1)
+    api.reconnect_lock.release()
@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+import json
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from icon_mirror import sync_icons, current_icon_dir
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def write_png(path, color):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    buffer = io.BytesIO()
+    Image.new("RGBA", (64, 64), color).save(buffer, format="PNG")
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+
+
+def start_cdn(root):
+    """本地替代CDN，目录结构与图标CDN和ddragon相同"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_sync_icons_against_local_cdn(tmp_path):
+    cdn = tmp_path / "cdn"
+    write_png(str(cdn / "champion" / "Ahri.png"), (255, 0, 0, 255))
+    write_png(str(cdn / "champion" / "Garen.png"), (0, 255, 0, 255))
+    write_png(str(cdn / "item" / "1001.png"), (0, 0, 255, 255))
+    (cdn / "14.1.1").mkdir()
+    (cdn / "14.1.1" / "item.json").write_text(json.dumps({"data": {"1001": {}, "9999": {}}}), encoding="utf-8")
+    champion_json = tmp_path / "champion.json"
+    champion_json.write_text(json.dumps([
+        {"id": -1, "name": "无", "alias": "None"},
+        {"id": 103, "name": "九尾妖狐", "alias": "Ahri"},
+        {"id": 86, "name": "德玛西亚之力", "alias": "Garen"}
+    ]), encoding="utf-8")
+    icons_dir = tmp_path / "icons"
+    # 旧版本目录在同步后会被删除
+    (icons_dir / "14.0.1").mkdir(parents=True)
+
+    server, base_url = start_cdn(cdn)
+    try:
+        version_dir, failed = sync_icons(version="14.1.1", icons_dir=str(icons_dir), base_url=base_url,
+                                 item_list_url=base_url + "/{version}/item.json",
+                                 champion_json=str(champion_json), max_workers=2)
+    finally:
+        server.shutdown()
+
+    # CDN上不存在的图标不算失败，不会让更新日志一直停在图标步骤
+    assert failed == 0
+    assert os.path.isfile(os.path.join(version_dir, "champion", "Ahri.png"))
+    assert os.path.isfile(os.path.join(version_dir, "item", "1001.png"))
+    # CDN上不存在的图标不会留下文件
+    assert not os.path.exists(os.path.join(version_dir, "item", "9999.png"))
+    assert not (icons_dir / "14.0.1").exists()
+    assert current_icon_dir(str(icons_dir)) == version_dir
+
+    with open(os.path.join(version_dir, "atlas.json"), "r", encoding="utf-8") as f:
+        atlas = json.load(f)
+    assert set(atlas["champion"]) == {"Ahri", "Garen"}
+    assert set(atlas["item"]) == {"1001"}
+    with Image.open(os.path.join(version_dir, "atlas.png")) as image:
+        assert image.size == (atlas["width"], atlas["height"])
+    assert not [f for f in os.listdir(version_dir) if f.endswith(".tmp")]
@@ -0,0 +1,25 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+import fast_json
+from placeholders import generate_placeholders
+
+
+def test_generate_placeholders_reports_failures(tmp_path):
+    save_dir = tmp_path / "id_skins"
+    save_dir.mkdir()
+    Image.new("RGB", (308, 560), (200, 30, 30)).save(str(save_dir / "1000.jpg"))
+    (save_dir / "1001.jpg").write_bytes(b"not a jpeg")
+    skins_json = tmp_path / "skins.json"
+    skins_json.write_text(json.dumps({"Annie": [{"id": 1000}, {"id": 1001}]}), encoding="utf-8")
+    output = tmp_path / "placeholders.json"
+
+    failed = generate_placeholders(str(skins_json), str(save_dir), str(output), max_workers=2)
+    assert failed == 1
+    placeholders = fast_json.load_file(str(output))
+    assert placeholders["1000"].startswith("data:image/jpeg;base64,")
+    assert "1001" not in placeholders
@@ -0,0 +1,200 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools
+import session_manager
+from lcu_discovery import LcuCredentials
+from task_supervisor import TaskSupervisor
+from session_manager import SessionManager, ClientSession
+from web_server import SkinWebServer
+
+
+class FakeGameAPI:
+    def __init__(self, install_dir):
+        self.credentials = LcuCredentials("1", "token", install_dir=install_dir)
+        self.summoner_id = "1"
+
+    def on_reconnect(self, callback):
+        pass
+
+
+class FakeProcess:
+    def __init__(self, commands, command):
+        commands.append(command)
+
+    def communicate(self):
+        return b"", b""
+
+
+def test_apply_skins_in_two_sessions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "skins.json").write_text("{}", encoding="utf-8")
+    commands = []
+    monkeypatch.setattr(tools.subprocess, "Popen", lambda command, **kwargs: FakeProcess(commands, command))
+    overlays = []
+    monkeypatch.setattr(tools.modTools, "runOverlay", lambda self, wait=False: overlays.append((self.name, self.game_path)))
+
+    supervisor = TaskSupervisor()
+    web_server = SkinWebServer(supervisor)
+    manager = SessionManager(supervisor, web_server, {})
+    web_server.sessions = manager
+    for session_id, champion in (("1", "Ahri"), ("2", "Garen")):
+        install_dir = str(tmp_path / f"client{session_id}" / "LeagueClient")
+        session = ClientSession(session_id, FakeGameAPI(install_dir), supervisor, web_server, {},
+                                manager.match_store, manager.history_store)
+        session.current_champion = champion
+        manager.sessions[session_id] = session
+    manager.default_id = "1"
+
+    client = web_server.app.test_client()
+    for session_id, skin in (("1", "Arcade Ahri"), ("2", "God-King Garen")):
+        res = client.post(f"/api/select_skin?session={session_id}", json={"skin": skin})
+        assert res.get_json()["success"], res.get_json()
+
+    game_dirs = [str(tmp_path / f"client{i}" / "Game") for i in ("1", "2")]
+    # 每个会话注入到自己客户端的游戏目录，overlay任务互不相同
+    assert overlays == [("overlay:1", game_dirs[0]), ("overlay:2", game_dirs[1])]
+    imports = [c for c in commands if "TXSBI" in c]
+    assert f'--game:"{game_dirs[0]}"' in imports[0] and "Arcade Ahri" in imports[0]
+    assert f'--game:"{game_dirs[1]}"' in imports[1] and "God-King Garen" in imports[1]
+    profiles = [c for c in commands if "TXSBM" in c]
+    assert manager.get("1").modtools.profile_path != manager.get("2").modtools.profile_path
+    assert manager.get("1").modtools.profile_path in profiles[0]
+    assert manager.get("2").modtools.profile_path in profiles[1]
+    supervisor.shutdown()
+
+
+def test_failed_session_start_is_not_registered(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "skins.json").write_text("{}", encoding="utf-8")
+    supervisor = TaskSupervisor()
+    web_server = SkinWebServer(supervisor)
+    manager = SessionManager(supervisor, web_server, {})
+    stopped = []
+    stop = ClientSession.stop
+
+    def fail_start(session):
+        supervisor.spawn(session.crawler.name, lambda task: task.stop_event.wait(5))
+        raise RuntimeError("启动失败")
+
+    monkeypatch.setattr(ClientSession, "start", fail_start)
+    monkeypatch.setattr(ClientSession, "stop", lambda session: (stopped.append(session.id), stop(session)))
+    try:
+        manager.add(FakeGameAPI(str(tmp_path / "LeagueClient")))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("会话启动失败时应抛出异常")
+
+    assert stopped == ["1"]
+    assert manager.list() == [] and manager.default_id is None
+    assert supervisor.get("history_crawler:1") is None
+    supervisor.shutdown()
+
+
+
+def test_task_limit_grows_with_sessions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "skins.json").write_text("{}", encoding="utf-8")
+    supervisor = TaskSupervisor(max_tasks=2)
+    web_server = SkinWebServer(supervisor)
+    manager = SessionManager(supervisor, web_server, {})
+    for name in ("web_server", "session_manager"):
+        supervisor.spawn(name, lambda task: task.stop_event.wait(5))
+
+    def start(session):
+        for name in (session.scheduler.name, session.crawler.name, session.prefetcher.name, session.modtools.name):
+            supervisor.spawn(name, lambda task: task.stop_event.wait(5))
+
+    monkeypatch.setattr(ClientSession, "start", start)
+    for i in range(5):
+        manager.add(FakeGameAPI(str(tmp_path / f"client{i}" / "LeagueClient")))
+    assert len(manager.list()) == 5 and len(supervisor.tasks) == 22
+
+    manager.remove("5")
+    assert supervisor.max_tasks == 2 + 4 * 4
+    assert len(supervisor.tasks) == 18
+    supervisor.shutdown()
+
+
+def test_scan_backs_off_while_sessions_are_stable(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "skins.json").write_text("{}", encoding="utf-8")
+    monkeypatch.setattr(session_manager, "SESSION_SCAN_INTERVAL", 0.01)
+    monkeypatch.setattr(session_manager, "SESSION_SCAN_MAX_INTERVAL", 0.4)
+    supervisor = TaskSupervisor()
+    manager = SessionManager(supervisor, SkinWebServer(supervisor), {})
+    install_dir = tmp_path / "LeagueClient"
+    install_dir.mkdir()
+    (install_dir / "lockfile").write_text("LeagueClient:1:2:token:https", encoding="utf-8")
+    stopped = []
+    manager.sessions = {
+        "1": SimpleNamespace(id="1", install_dir=str(tmp_path / "Default" / "LeagueClient")),
+        "2": SimpleNamespace(id="2", install_dir=str(install_dir), stop=lambda: stopped.append("2")),
+    }
+    manager.default_id = "1"
+    scans = []
+    clients = [LcuCredentials("2", "token", install_dir=str(install_dir))]
+    manager.discovery = SimpleNamespace(discover_all=lambda: scans.append(time.monotonic()) or list(clients))
+
+    manager.start()
+    time.sleep(0.8)
+    # 没有退避时约80次完整扫描
+    assert 2 <= len(scans) <= 8
+
+    # 客户端关闭后不必等到退避结束，lockfile消失即重新扫描
+    clients.clear()
+    (install_dir / "lockfile").unlink()
+    deadline = time.monotonic() + 0.2
+    while not stopped and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stopped == ["2"]
+    supervisor.shutdown()
+
+
+def test_renamed_champion_profile_follows_imported_zip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "skins.json").write_text("{}", encoding="utf-8")
+    commands = []
+    monkeypatch.setattr(tools.subprocess, "Popen", lambda command, **kwargs: FakeProcess(commands, command))
+    monkeypatch.setattr(tools.modTools, "runOverlay", lambda self, wait=False: None)
+    # lol-skins 只在改名后的目录下提供压缩包
+    fallback_path = "skins\\Miss Fortune\\Arcade Miss Fortune.zip"
+    (tmp_path / fallback_path).write_bytes(b"zip v1")
+
+    supervisor = TaskSupervisor()
+    web_server = SkinWebServer(supervisor)
+    manager = SessionManager(supervisor, web_server, {})
+    web_server.sessions = manager
+    session = ClientSession("1", FakeGameAPI(str(tmp_path / "LeagueClient")), supervisor, web_server, {},
+                            manager.match_store, manager.history_store)
+    session.current_champion = "MissFortune"
+    manager.sessions["1"] = session
+    manager.default_id = "1"
+    modtools = session.modtools
+    client = web_server.app.test_client()
+
+    def select():
+        res = client.post("/api/select_skin?session=1", json={"skin": "Arcade Miss Fortune"})
+        assert res.get_json()["success"], res.get_json()
+
+    select()
+    imports = [c for c in commands if "TXSBI" in c]
+    assert len(imports) == 1 and fallback_path in imports[0]
+    key = modtools.profile_key(["Arcade Miss Fortune"], [fallback_path])
+    assert list(modtools.profile_cache) == [key]
+
+    # 同一个压缩包再次选择时命中缓存
+    os.makedirs(os.path.join(modtools.profile_path, key))
+    select()
+    assert len([c for c in commands if "TXSBI" in c]) == 1
+
+    # 压缩包更新后指纹变化，重新导入
+    (tmp_path / fallback_path).write_bytes(b"zip v2, larger")
+    select()
+    assert len([c for c in commands if "TXSBI" in c]) == 2
+    supervisor.shutdown()
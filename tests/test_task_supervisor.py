@@ -0,0 +1,21 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_supervisor import TaskSupervisor
+
+
+def test_background_work_does_not_starve_foreground_submits():
+    supervisor = TaskSupervisor(max_workers=2, background_workers=2)
+    release = threading.Event()
+    # 大量后台请求占满后台线程池
+    background = [supervisor.submit_background(release.wait, 5) for _ in range(20)]
+    try:
+        assert supervisor.submit(lambda: "ok").result(timeout=1) == "ok"
+        assert not any(future.done() for future in background)
+    finally:
+        release.set()
+    assert all(future.result(timeout=1) for future in background)
+    supervisor.shutdown()
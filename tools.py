@@ -1,65 +1,45 @@
 import os
 import logging
-import psutil
 import subprocess
-import threading
 import time
 import ctypes
 import requests
 import json
 import time
+import shutil
+import hashlib
+import threading
 import globals
 
 requests.packages.urllib3.disable_warnings() 
-# 设置日志格式
-logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from ctypes import wintypes
+from lcu_discovery import LcuDiscovery
+from placeholders import generate_placeholders
+from icon_mirror import sync_icons
+import fast_json
+from update_journal import UpdateJournal, read_version
+from cache_node import CacheNodeClient, CACHE_NODE_URL
+from adaptive_limiter import AdaptiveLimiter, ADAPTIVE_MAX
 
 SKINS_JSON_PATH = "skins.json"
 SAVE_DIR = "id_skins"
-MAX_WORKERS = 32
+# 线程数上限，实际并发由自适应控制器决定
+MAX_WORKERS = ADAPTIVE_MAX
 RETRIES = 5
 TIMEOUT = 10
+# 皮肤id同步和图片下载共用，前一个任务探测到的并发数延续到下一个任务
+download_limiter = AdaptiveLimiter()
+# 缓存的overlay配置占用磁盘上限
+PROFILE_CACHE_BUDGET = 2 * 1024 * 1024 * 1024
+PROFILE_CACHE_INDEX = "profile_cache.json"
 
 class tools:
 
-    def check_game_path(self, path: str) -> str:
-        if os.path.exists(path) and "LeagueClient.exe" in path:
-            return os.path.dirname(path)  
-        elif os.path.exists(path) and "League of Legends.exe" in path:
-            return os.path.dirname(path)
-        return ""
-
-    def get_full_process_image_name(self, pid: int) -> str:
-        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
-        h_process = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
-        if not h_process:
-            return ""
-
-        buffer_len = wintypes.DWORD(32767)
-        buffer = ctypes.create_unicode_buffer(buffer_len.value)
-        if ctypes.windll.kernel32.QueryFullProcessImageNameW(h_process, 0, buffer, ctypes.byref(buffer_len)):
-            ctypes.windll.kernel32.CloseHandle(h_process)
-            return buffer.value
-        ctypes.windll.kernel32.CloseHandle(h_process)
-        return ""
-
     def detect_game_path(self):
-        target_names = {"LeagueClient.exe", "League of Legends.exe"}
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                if proc.info['name'] in target_names:
-                    full_path = self.get_full_process_image_name(proc.info['pid'])
-                    result = self.check_game_path(full_path)
-                    if result:
-                        result = result.replace("LeagueClient","Game")
-                        return result
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        return ""
+        """通过缓存的客户端目录获取游戏目录，必要时才遍历进程"""
+        return LcuDiscovery().game_path()
     
     def list_skin_directories(self):
         """
@@ -89,7 +69,7 @@ class tools:
                 
                 skins_dict[normalized_champion] = []
                 for skin in os.listdir(champion_path):
-                    # TODO: 暂时忽略炫彩的处理
+                    # 炫彩由ChromaIndex在选择英雄时按需索引
                     if skin.lower() == "chromas": 
                         continue
                     skin_path = os.path.join(champion_path, skin)
@@ -106,13 +86,28 @@ class tools:
     
     
 class modTools:
-    def __init__(self):
+    def __init__(self, supervisor, zip_index=None, game_path=None, name="overlay"):
+        """
+        Args:
+            game_path: 游戏目录，多开时每个客户端会话传入自己的目录；为None时自动检测
+            name: overlay任务名称，各会话的overlay互不取消
+        """
         self.tools = tools()
-        self.installed_path = os.path.join(os.getcwd(), "installed")
-        self.profile_path = os.path.join(os.getcwd(), "profiles")
-        self.game_path = self.tools.detect_game_path()
+        self.supervisor = supervisor
+        self.name = name
+        # 用于取得压缩包的大小和CRC，皮肤内容更新后不再复用旧配置
+        self.zip_index = zip_index
+        self.game_path = game_path or self.tools.detect_game_path()
         if not self.game_path:
             raise RuntimeError("Game path not found. Please start the game first.")
+        # 导入的mod和构建的配置依赖游戏目录，不同客户端目录分开存放
+        workspace = hashlib.sha1(os.path.normcase(os.path.normpath(self.game_path)).encode("utf-8")).hexdigest()[:8]
+        self.installed_path = os.path.join(os.getcwd(), "installed", workspace)
+        self.profile_path = os.path.join(os.getcwd(), "profiles", workspace)
+        # 按mod集合缓存的overlay配置
+        self.profile_lock = threading.Lock()
+        self.profile_cache = self.load_profile_cache()
+        self.current_profile = os.path.join(self.profile_path, "Default Profile")
         
         
 
@@ -134,14 +129,105 @@ class modTools:
         ).communicate()
 
         if err:
-            logging.error(err.decode())
+            logging.error(f"导入mod失败 {mod_name}: {err.decode('gbk', errors='replace').strip()}")
             return False
         else:
-            logging.info(out.decode("gbk"))
+            logging.info(f"已导入mod: {mod_name}")
+            # 完整输出只在调试时解码
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(out.decode("gbk", errors="replace"))
             return True
         
-    def saveProfile(self, mod_name: str):
-        command = f"SBTX.exe TXSBM \"{self.installed_path}\" \"{self.profile_path}\Default Profile\" --game:\"{self.game_path}\" \"--mods:{mod_name}\" --noTFT \"\""
+    def load_profile_cache(self):
+        """读取overlay配置缓存索引"""
+        try:
+            return fast_json.load_file(os.path.join(self.profile_path, PROFILE_CACHE_INDEX))
+        except Exception:
+            return {}
+
+    def save_profile_cache(self):
+        os.makedirs(self.profile_path, exist_ok=True)
+        fast_json.dump_file(os.path.join(self.profile_path, PROFILE_CACHE_INDEX), self.profile_cache)
+
+    def get_game_version(self):
+        """获取游戏版本，用于区分不同版本下构建的配置"""
+        try:
+            with open("version", "r") as f:
+                return f.read().strip()
+        except Exception:
+            return "unknown"
+
+    def mod_fingerprint(self, mod_path):
+        """压缩包内容的指纹，优先使用zip索引中的CRC摘要，没有索引时使用大小和修改时间"""
+        if not mod_path:
+            return None
+        entry = self.zip_index.get(mod_path) if self.zip_index else None
+        if entry:
+            return f"{entry.get('size')}:{entry.get('mtime')}:{entry.get('crc')}"
+        try:
+            stat = os.stat(mod_path)
+        except OSError:
+            return None
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def profile_key(self, mods, mod_paths=()):
+        """mod集合、压缩包指纹加游戏版本的哈希
+
+        lol-skins更新压缩包时游戏版本不一定变化，指纹保证内容变化后重新构建配置。
+        """
+        raw = json.dumps({
+            "mods": sorted(mods),
+            "sources": sorted(str(self.mod_fingerprint(path)) for path in mod_paths),
+            "version": self.get_game_version()
+        }, ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def use_cached_profile(self, mod_name: str, mod_path: str = None):
+        """已有相同mod集合的配置时直接切换过去，无需重新导入和构建"""
+        key = self.profile_key([mod_name], [mod_path] if mod_path else ())
+        profile = os.path.join(self.profile_path, key)
+        with self.profile_lock:
+            if key not in self.profile_cache or not os.path.isdir(profile):
+                return False
+            self.profile_cache[key]["last_used"] = time.time()
+            self.save_profile_cache()
+        self.current_profile = profile
+        logging.info(f"使用缓存的overlay配置: {mod_name}")
+        return True
+
+    def evict_profiles(self, keep):
+        """按最近使用时间淘汰配置，直到总大小不超过磁盘预算"""
+        total = sum(entry.get("size", 0) for entry in self.profile_cache.values())
+        for key in sorted(self.profile_cache, key=lambda k: self.profile_cache[k].get("last_used", 0)):
+            if total <= PROFILE_CACHE_BUDGET:
+                break
+            if key == keep:
+                continue
+            entry = self.profile_cache.pop(key)
+            total -= entry.get("size", 0)
+            shutil.rmtree(os.path.join(self.profile_path, key), ignore_errors=True)
+            try:
+                os.remove(os.path.join(self.profile_path, f"{key}.config"))
+            except OSError:
+                pass
+            logging.info(f"已淘汰overlay配置: {entry.get('mods')}")
+
+    @staticmethod
+    def dir_size(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for f in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, f))
+                except OSError:
+                    pass
+        return total
+
+    def saveProfile(self, mod_name: str, mod_path: str = None):
+        """为mod集合构建独立的overlay配置并加入缓存"""
+        key = self.profile_key([mod_name], [mod_path] if mod_path else ())
+        profile = os.path.join(self.profile_path, key)
+        command = f"SBTX.exe TXSBM \"{self.installed_path}\" \"{profile}\" --game:\"{self.game_path}\" \"--mods:{mod_name}\" --noTFT \"\""
         
         out, err = subprocess.Popen(
             command,
@@ -149,26 +235,36 @@ class modTools:
         ).communicate()
 
         if err:
-            logging.err(err.decode("gbk"))
+            logging.error(f"保存配置失败 {mod_name}: {err.decode('gbk', errors='replace').strip()}")
             return False
         else:
-            logging.info(out.decode("gbk"))
+            logging.info(f"已保存overlay配置: {mod_name}")
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(out.decode("gbk", errors="replace"))
+            with self.profile_lock:
+                self.profile_cache[key] = {
+                    "mods": [mod_name],
+                    "version": self.get_game_version(),
+                    "last_used": time.time(),
+                    "size": self.dir_size(profile)
+                }
+                self.evict_profiles(keep=key)
+                self.save_profile_cache()
+            self.current_profile = profile
             return True
         
     def runOverlay(self, wait=False):
         """
-        在单独的线程中运行overlay并实时返回标准输出
+        由任务管理器运行overlay并实时输出日志，之前运行中的overlay会被取消
         
         Args:
-            wait (bool): 如果为True，则主线程将等待overlay线程完成
+            wait (bool): 如果为True，则主线程将等待overlay任务完成
             
         Returns:
-            tuple: (threading.Thread, threading.Event) 返回线程对象和停止事件，可用于后续操作
+            SupervisedTask: overlay任务，可用于后续取消
         """
-        command = f"SBTX.exe TXSBR \"{self.profile_path}\\Default Profile\" \"{self.profile_path}\\Default Profile.config\" --game:\"{self.game_path}\" \"--mods:Nottingham Ezreal\" --opts:none"
-        
-        # 创建停止事件
-        stop_event = threading.Event()
+        profile = self.current_profile
+        command = f"SBTX.exe TXSBR \"{profile}\" \"{profile}.config\" --game:\"{self.game_path}\" \"--mods:Nottingham Ezreal\" --opts:none"
         
         # Check if process has admin privileges
         def is_admin():
@@ -177,8 +273,8 @@ class modTools:
             except:
                 return False
         
-        # Create a thread to run the command
-        def run_command():
+        # Run the command inside the supervised task
+        def run_command(task):
             # Check if we already have admin privileges
             if is_admin():
                 # Run normally as we already have admin rights
@@ -187,61 +283,32 @@ class modTools:
                     command,
                     shell=True,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
                     text=True,
                     encoding='gbk'
                 )
-
-                # Get parent process ID to find and terminate child processes
-                parent_pid = process.pid
-
-                # Separate thread to read stdout
-                def read_stdout():
-                    for line in iter(process.stdout.readline, ''):
-                        logging.info(f"Overlay output: {line.strip()}")
-                    process.stdout.close()
-
-                stdout_thread = threading.Thread(target=read_stdout)
-                stdout_thread.start()
-
-                # Main thread waits for stop_event
-                while not stop_event.is_set() and process.poll() is None:
-                    time.sleep(0.1)
-
-                if stop_event.is_set():
-                    logging.info("Received stop signal, terminating overlay process...")
-
-                    # Use psutil to find and terminate child processes
-                    try:
-                        parent_process = psutil.Process(parent_pid)
-                        for child in parent_process.children(recursive=True):
-                            logging.info(f"Killing child process {child.pid}")
-                            child.terminate()
-                            child.wait(timeout=5)
-                    except psutil.NoSuchProcess:
-                        logging.warning("No such process found")
-
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        logging.warning("Process didn't exit in time. Killing...")
-                        process.kill()
-
-                stdout_thread.join()
-
-                # Read stderr output
-                stderr = process.stderr.read()
-                process.stderr.close()
-                if stderr:
-                    logging.error(f"Overlay error: {stderr.strip()}")
+                # Cancelling the task terminates the process tree, which closes stdout
+                self.supervisor.track_process(task, process)
+
+                # overlay输出量大，只在调试时记录
+                debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+                for line in iter(process.stdout.readline, ''):
+                    if debug:
+                        logging.debug(f"Overlay output: {line.strip()}")
+                process.stdout.close()
+                process.wait()
+
+                if task.cancelled():
+                    logging.info("Received stop signal, overlay process terminated")
+                elif process.returncode:
+                    logging.error(f"Overlay exited with code {process.returncode}")
             else:
                 # Need to request admin privileges
                 try:
                     logging.info("Starting overlay with admin privileges...")
                     
                     # Prepare arguments
-                    overlay_args = f"runoverlay \"{self.profile_path}\\Default Profile\" \"{self.profile_path}\\Default Profile.config\" --game:\"{self.game_path}\" \"--mods:Nottingham Ezreal\" --opts:none"
+                    overlay_args = f"runoverlay \"{profile}\" \"{profile}.config\" --game:\"{self.game_path}\" \"--mods:Nottingham Ezreal\" --opts:none"
                     
                     # Request admin privileges using ShellExecuteW
                     result = ctypes.windll.shell32.ShellExecuteW(
@@ -272,129 +339,152 @@ class modTools:
                         }
                         error_msg = error_codes.get(result, f"Unknown error code: {result}")
                         logging.error(f"Failed to start overlay: {error_msg}")
-                    else:
-                        logging.info("Successfully started overlay with admin privileges")
+                        return
                     
-                    # Wait for stop event
-                    while not stop_event.is_set():
-                        time.sleep(0.5)
+                    logging.info("Successfully started overlay with admin privileges")
                     
-                    if stop_event.is_set():
-                        logging.info("Received stop signal, but cannot directly terminate admin process. Please close overlay window manually.")
+                    # Wait for stop event
+                    task.stop_event.wait()
+                    logging.info("Received stop signal, but cannot directly terminate admin process. Please close overlay window manually.")
                     
                 except Exception as e:
                     logging.error(f"Error starting overlay: {e}")
 
-        overlay_thread = threading.Thread(target=run_command)
-        overlay_thread.daemon = True
-        overlay_thread.start()
+        overlay_task = self.supervisor.spawn(self.name, run_command, order=40)
 
-        logging.info("Overlay process started in background thread")
+        logging.info("Overlay process started in supervised task")
 
         if wait:
-            overlay_thread.join()
+            overlay_task.thread.join()
             logging.info("Overlay process completed")
 
-        return overlay_thread, stop_event
+        return overlay_task
     
 
+def latest_version():
+    """ddragon上的最新版本号"""
+    return requests.get("https://ddragon.leagueoflegends.com/api/versions.json", timeout=TIMEOUT).json()[0]
+
 def checkIsLatestVersion():
-    logging.info("检查lol版本, 判断是否需要更新皮肤数据...")
-    version = requests.get("https://ddragon.leagueoflegends.com/api/versions.json").json()[0]
+    """检查本地数据是否为最新版本
 
-    try:
-        with open("version", "r") as f:
-            current_version = f.read().strip()
+    只读取已提交的版本，version文件由更新流程在全部步骤完成后写入。
+    """
+    logging.info("检查lol版本, 判断是否需要更新皮肤数据...")
+    journal = UpdateJournal()
+    if journal.pending():
+        logging.info(f"存在未完成的更新: {journal.pending()}")
+        return False
 
-        if current_version != version:
-            logging.info(f"当前版本: {current_version}，最新版本: {version}")
-            with open("version", "w") as f:
-                f.write(version)
-            return False
-        else:
-            logging.info("当前版本已是最新")
-            return True
-    except:
-        
-        with open("version", "w") as f:
-            f.write(version)
-        return False # 也返回false 方便初始化
+    current_version = read_version()
+    version = latest_version()
+    if current_version != version:
+        logging.info(f"当前版本: {current_version}，最新版本: {version}")
+        return False
+    logging.info("当前版本已是最新")
+    return True
 
 
-def sync_skinsId(output_path=SKINS_JSON_PATH, max_workers=MAX_WORKERS):
+def sync_skinsId(output_path=SKINS_JSON_PATH, max_workers=MAX_WORKERS, version=None, limiter=None):
     """
-    同步皮肤数据
+    同步皮肤数据，返回同步失败的英雄数量
     """
+    # 配置了缓存节点时直接拉取节点上的skins.json和champion.json
+    if CACHE_NODE_URL and output_path == SKINS_JSON_PATH:
+        try:
+            client = CacheNodeClient()
+            try:
+                client.sync("champion.json")
+            except Exception as e:
+                logging.warning(f"从缓存节点同步champion.json失败: {e}")
+            _, failed = client.sync("skins.json")
+            if not failed:
+                return 0
+        except Exception as e:
+            logging.warning(f"从缓存节点同步skins.json失败，改用ddragon: {e}")
+
     # 加载本地已有数据
     if os.path.exists(output_path):
-        with open(output_path, "r", encoding="utf-8") as f:
-            local_data = json.load(f)
+        local_data = fast_json.load_file(output_path)
     else:
         local_data = {}
 
     # 获取最新版本号
-    version = requests.get("https://ddragon.leagueoflegends.com/api/versions.json").json()[0]
+    if version is None:
+        version = latest_version()
+
+    limiter = limiter or download_limiter
 
     # 获取所有英雄列表
     champion_list_url = f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json"
     champion_list = requests.get(champion_list_url).json()["data"]
     champion_keys = list(champion_list.keys())
 
-    def fetch_skins_if_new_added(champion_key, retries=5, delay=1):
+    def fetch_skins_if_new_added(champion_key):
         """
         获取单个英雄皮肤信息，判断是否有新增皮肤（基于 skin id）
         """
         url = f"https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion/{champion_key}.json"
-        for attempt in range(retries):
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                data = response.json()["data"][champion_key]
-            
-                # 跳过原皮
-                new_skins = [
-                    {"id": skin["id"], "name": skin["name"], "num": skin["num"]}
-                    for skin in data["skins"]  
-                    if skin["num"] != 0
-
-                ]
-                # 差量判断逻辑
-                local_skins = local_data.get(champion_key, [])
-                local_ids = {skin["id"] for skin in local_skins}
-                new_ids = {skin["id"] for skin in new_skins}
-                if not new_ids.issubset(local_ids):  # 有新增
-                    return champion_key, new_skins
-                else:
-                    return champion_key, None  # 无新增
-            except Exception as e:
-                if attempt < retries - 1:
-                    time.sleep(delay)
-                else:
-                    return champion_key, f"Error: {str(e)}"
+        try:
+            response = limiter.get(url, retries=RETRIES, timeout=TIMEOUT)
+            if response is None:
+                return champion_key, "Error: 重试次数用尽"
+            response.raise_for_status()
+            data = response.json()["data"][champion_key]
+        
+            # 跳过原皮
+            new_skins = [
+                {"id": skin["id"], "name": skin["name"], "num": skin["num"]}
+                for skin in data["skins"]  
+                if skin["num"] != 0
+
+            ]
+            # 差量判断逻辑
+            local_skins = local_data.get(champion_key, [])
+            local_ids = {skin["id"] for skin in local_skins}
+            new_ids = {skin["id"] for skin in new_skins}
+            if not new_ids.issubset(local_ids):  # 有新增
+                return champion_key, new_skins
+            else:
+                return champion_key, None  # 无新增
+        except Exception as e:
+            return champion_key, f"Error: {str(e)}"
 
     result = local_data.copy()
+    failed = 0
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = [executor.submit(fetch_skins_if_new_added, key) for key in champion_keys]
-        for future in tqdm(as_completed(futures), total=len(futures), desc="Checking skins"):
+        progress = tqdm(as_completed(futures), total=len(futures), desc="Checking skins")
+        for future in progress:
+            progress.set_postfix(workers=limiter.limit)
             champ_key, skins = future.result()
             if isinstance(skins, list):
                 result[champ_key] = skins
             elif skins is None:
                 pass
             else:
+                failed += 1
                 logging.warning(f"{champ_key} failed: {skins}")
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    fast_json.dump_file(output_path, result)
 
-    logging.info(f"皮肤id更新完毕，共 {len(result)} 个英雄")
+    logging.info(f"皮肤id更新完毕，共 {len(result)} 个英雄，失败 {failed} 个，下载并发: {limiter.stats()}")
+    return failed
 
-def download_all_skins(skins_json_path=SKINS_JSON_PATH, save_dir=SAVE_DIR, max_workers=MAX_WORKERS):
+def download_all_skins(skins_json_path=SKINS_JSON_PATH, save_dir=SAVE_DIR, max_workers=MAX_WORKERS, limiter=None):
+    """下载缺失的皮肤预览图，返回下载失败的数量"""
     os.makedirs(save_dir, exist_ok=True)
+    limiter = limiter or download_limiter
+
+    # 先从缓存节点拉取差异图片，节点上没有的再从ddragon下载
+    if CACHE_NODE_URL and save_dir == SAVE_DIR:
+        try:
+            CacheNodeClient().sync("id_skins")
+        except Exception as e:
+            logging.warning(f"从缓存节点同步预览图失败: {e}")
 
-    with open(skins_json_path, "r", encoding="utf-8") as f:
-        skins_data = json.load(f)
+    skins_data = fast_json.load_file(skins_json_path)
 
     tasks = []
     skipped = 0
@@ -415,17 +505,14 @@ def download_all_skins(skins_json_path=SKINS_JSON_PATH, save_dir=SAVE_DIR, max_w
         url = f"https://ddragon.leagueoflegends.com/cdn/img/champion/splash/{champion_key}_{skin_num}.jpg"
         save_path = os.path.join(save_dir, f"{skin_id}.jpg")
 
-        for attempt in range(RETRIES):
-            try:
-                resp = requests.get(url, timeout=TIMEOUT)
-                if resp.status_code == 200:
-                    with open(save_path, "wb") as f:
-                        f.write(resp.content)
-                    return True
-                time.sleep(1)
-            except Exception:
-                time.sleep(1)
-        return False
+        resp = limiter.get(url, retries=RETRIES, timeout=TIMEOUT)
+        if resp is None or resp.status_code != 200:
+            return False
+        # 先写临时文件，中断时不会留下被当作已下载的残缺图片
+        with open(save_path + ".tmp", "wb") as f:
+            f.write(resp.content)
+        os.replace(save_path + ".tmp", save_path)
+        return True
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_task = {
@@ -433,17 +520,92 @@ def download_all_skins(skins_json_path=SKINS_JSON_PATH, save_dir=SAVE_DIR, max_w
             for champion_key, skin_id, skin_num in tasks
         }
 
-        for future in tqdm(as_completed(future_to_task), total=len(future_to_task), desc="Downloading skins"):
+        failed = 0
+        progress = tqdm(as_completed(future_to_task), total=len(future_to_task), desc="Downloading skins")
+        for future in progress:
+            progress.set_postfix(workers=limiter.limit)
             champion_key, skin_id = future_to_task[future]
             try:
-                success = future.result()
-                if not success:
-                    pass 
+                if not future.result():
+                    failed += 1
             except Exception as e:
+                failed += 1
                 logging.error(f"[!] Exception for {champion_key}:{skin_id} -> {e}")
 
-    logging.info("All new skins downloaded.")
+    logging.info(f"All new skins downloaded. 失败 {failed} 张，下载并发: {limiter.stats()}")
+    return failed
 
-def updateSkin():
-    sync_skinsId()
-    download_all_skins()
\ No newline at end of file
+def verify_skin_images(skins_json_path=SKINS_JSON_PATH, save_dir=SAVE_DIR):
+    """删除残缺的预览图并重新下载，返回仍缺失的数量"""
+    skins_data = fast_json.load_file(skins_json_path)
+    broken = 0
+    for skins in skins_data.values():
+        for skin in skins:
+            path = os.path.join(save_dir, f"{skin['id']}.jpg")
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    valid = f.read(2) == b"\xff\xd8"
+                    f.seek(-2, os.SEEK_END)
+                    valid = valid and f.read(2) == b"\xff\xd9"
+            except OSError:
+                valid = False
+            if not valid:
+                os.remove(path)
+                broken += 1
+    if broken:
+        logging.warning(f"发现 {broken} 张残缺的预览图，重新下载")
+        download_all_skins(skins_json_path, save_dir)
+    missing = sum(1 for skins in skins_data.values() for skin in skins
+                  if not os.path.exists(os.path.join(save_dir, f"{skin['id']}.jpg")))
+    if missing:
+        logging.warning(f"仍有 {missing} 张预览图无法下载")
+    return missing
+
+def updateSkin(version=None):
+    """以事务方式更新皮肤数据
+
+    依次同步皮肤id、下载预览图、校验、生成占位图和图标，每步完成后记录检查点，
+    全部完成才写入version文件。中断后再次调用会从未完成的步骤继续。
+    """
+    journal = UpdateJournal()
+    version = version or journal.pending() or latest_version()
+    journal.begin(version)
+
+    # 任一步骤有失败项时抛出异常，日志保持未完成状态，下次启动从该步骤重试
+    def sync_metadata():
+        failed = sync_skinsId(version=version)
+        if failed:
+            raise RuntimeError(f"{failed} 个英雄的皮肤id同步失败")
+        globals.sync_skins = True
+
+    def download_images():
+        failed = download_all_skins()
+        if failed:
+            raise RuntimeError(f"{failed} 张预览图下载失败")
+        globals.sync_skins_picture = True
+
+    def verify_images():
+        missing = verify_skin_images()
+        if missing:
+            raise RuntimeError(f"仍有 {missing} 张预览图缺失")
+
+    def make_placeholders():
+        failed = generate_placeholders()
+        if failed:
+            raise RuntimeError(f"{failed} 个占位图生成失败")
+
+    def mirror_icons():
+        _, failed = sync_icons(version=version)
+        if failed:
+            raise RuntimeError(f"{failed} 个图标下载失败")
+
+    journal.run([
+        ("metadata", sync_metadata),
+        ("images", download_images),
+        ("verify", verify_images),
+        ("placeholders", make_placeholders),
+        ("icons", mirror_icons),
+    ])
+    globals.is_latest = True
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os
+import time
+import logging
+import fast_json
+
+UPDATE_JOURNAL_PATH = "update_journal.json"
+VERSION_PATH = "version"
+
+
+def read_version(path=VERSION_PATH):
+    """已提交的数据版本，不存在时返回None"""
+    try:
+        with open(path, "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+class UpdateJournal:
+    """更新流程的事务日志
+
+    每完成一个步骤就记录检查点，中断后下次启动从未完成的步骤继续；
+    所有步骤完成后才写入version文件提交本次更新，并删除日志。
+    """
+
+    def __init__(self, path=UPDATE_JOURNAL_PATH, version_path=VERSION_PATH):
+        self.path = path
+        self.version_path = version_path
+        self.state = self.load()
+
+    def load(self):
+        try:
+            return fast_json.load_file(self.path)
+        except Exception:
+            return None
+
+    def save(self):
+        fast_json.dump_file(self.path, self.state)
+
+    def pending(self):
+        """未提交的更新目标版本"""
+        return self.state["version"] if self.state else None
+
+    def begin(self, version):
+        """开始或继续更新到指定版本，目标版本变化时重新开始"""
+        if self.state and self.state["version"] == version:
+            logging.info(f"继续未完成的更新 {version}，已完成步骤: {', '.join(self.state['completed']) or '无'}")
+            return
+        self.state = {"version": version, "started": time.time(), "completed": []}
+        self.save()
+
+    def is_done(self, step):
+        return bool(self.state) and step in self.state["completed"]
+
+    def checkpoint(self, step):
+        self.state["completed"].append(step)
+        self.save()
+
+    def run(self, steps):
+        """按顺序执行 [(name, func), ...]，跳过已完成的步骤
+
+        某一步抛出异常时保留日志，不提交版本。
+        """
+        for name, func in steps:
+            if self.is_done(name):
+                logging.info(f"跳过已完成的更新步骤: {name}")
+                continue
+            logging.info(f"执行更新步骤: {name}")
+            func()
+            self.checkpoint(name)
+        self.commit()
+
+    def commit(self):
+        """写入版本标记并结束事务"""
+        version = self.state["version"]
+        tmp_path = self.version_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, self.version_path)
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.state = None
+        logging.info(f"更新已提交，当前版本: {version}")
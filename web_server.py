@@ -1,87 +1,91 @@
 import os
 import logging
+import mimetypes
 import threading
-import webbrowser
-import json
-import atexit
-import signal
-import psutil
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, redirect, Response
+from werkzeug.serving import make_server
+from chroma_index import ChromaIndex
+from preview_cache import PreviewCache
+from placeholders import PlaceholderStore
+from icon_mirror import current_icon_dir, ICON_CDN, ICON_KINDS
+from single_flight import SingleFlight
+from search_index import SkinSearchIndex, SEARCH_LIMIT
+from compression import PrecompressedAsset, install_compression
+import fast_json
 
 targetPort = None
+# 预览图浏览器缓存时间(秒)
+PREVIEW_MAX_AGE = 86400
+# 图标路径带版本号，可以长期缓存
+ICON_MAX_AGE = 365 * 86400
 
 class SkinWebServer:
-    def __init__(self, modtools=None, game_stats=None):
+    def __init__(self, supervisor, sessions=None, zip_index=None):
+        """
+        Args:
+            sessions: SessionManager，各客户端会话的英雄、战绩状态和mod工具；皮肤目录和图片缓存由所有会话共享
+        """
         self.app = Flask(__name__, template_folder='templates', static_folder='static')
-        self.modtools = modtools
-        self.game_stats = game_stats
-        self.current_champion = None
-        self.available_skins = []
+        self.app.json = fast_json.FastJSONProvider(self.app)
+        install_compression(self.app)
+        self.supervisor = supervisor
+        self.sessions = sessions
+        self.port = None
         self.skins_data = self.load_skins_json()
-        self.server_thread = None
-        self.overlay_thread = None
-        self.overlay_stop_event = None
+        # 全部英雄皮肤的搜索索引，皮肤目录文件变化时增量更新
+        self.search_index = SkinSearchIndex()
+        self.catalog_mtimes = None
+        self.catalog_lock = threading.Lock()
+        self.refresh_catalog()
+        self.chromas = ChromaIndex()
+        self.zip_index = zip_index
+        self.preview_cache = PreviewCache()
+        self.placeholders = PlaceholderStore()
+        self.server = None
+        # 首页渲染结果缓存 {会话id: (key, 结果)}，英雄或皮肤列表变化时重新渲染
+        self.index_cache = {}
+        self.index_lock = threading.Lock()
+        # 相同的战绩请求同时到达时只计算一次
+        self.flight = SingleFlight()
         
         # 注册路由
         self.register_routes()
         
         if not os.path.exists("templates"):
             os.makedirs("templates")
-        
-        # 注册退出处理
-        atexit.register(self.cleanup)
-        signal.signal(signal.SIGTERM, self.signal_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
-    
-    def signal_handler(self, signum, frame):
-        """处理终止信号"""
-        logging.info("收到终止信号，正在清理...")
-        self.cleanup()
-        os._exit(0)
-    
-    def cleanup(self):
-        """清理所有相关进程"""
-        logging.info("正在清理Web服务器相关进程...")
-        
-        # 停止overlay
-        if self.overlay_stop_event:
-            self.overlay_stop_event.set()
-            if self.overlay_thread:
-                self.overlay_thread.join(timeout=2)
-        
-        # 获取当前进程
-        current_process = psutil.Process()
-        try:
-            # 获取所有子进程
-            children = current_process.children(recursive=True)
-            for child in children:
-                try:
-                    logging.info(f"正在终止进程: {child.pid}")
-                    child.terminate()
-                except psutil.NoSuchProcess:
-                    pass
-                except Exception as e:
-                    logging.error(f"终止进程 {child.pid} 时出错: {e}")
-            
-            # 等待所有子进程结束
-            gone, alive = psutil.wait_procs(children, timeout=3)
-            for p in alive:
-                try:
-                    p.kill()
-                except psutil.NoSuchProcess:
-                    pass
-        except Exception as e:
-            logging.error(f"清理进程时出错: {e}")
     
     def load_skins_json(self):
         """加载skins.json文件中的皮肤数据"""
         try:
-            with open("skins.json", "r", encoding="utf-8") as f:
-                return json.load(f)
+            return fast_json.load_file("skins.json")
         except Exception as e:
             logging.error(f"Failed to load skins.json: {e}")
             return {}
     
+    def refresh_catalog(self):
+        """skins.json或champion.json修改后重新加载，并只重建有变化的英雄的索引"""
+        mtimes = []
+        for path in ("skins.json", "champion.json"):
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        with self.catalog_lock:
+            if mtimes == self.catalog_mtimes:
+                return
+            if self.catalog_mtimes is not None:
+                self.skins_data = self.load_skins_json()
+            # champion.json和skins.json的英雄key大小写不一定一致，如FiddleSticks和Fiddlesticks
+            try:
+                names_by_alias = {c["alias"].lower(): c["name"] for c in fast_json.load_file("champion.json")}
+            except Exception:
+                names_by_alias = {}
+            champion_names = {champion: names_by_alias[champion.lower()]
+                              for champion in self.skins_data if champion.lower() in names_by_alias}
+            changed = self.search_index.sync(self.skins_data, champion_names)
+            self.catalog_mtimes = mtimes
+            logging.info(f"皮肤搜索索引已更新 {changed} 个英雄，共 {self.search_index.stats()['skins']} 个皮肤")
+    
     def get_skin_id(self, champion, skin_name):
         """根据英雄名和皮肤名获取皮肤ID"""
         if not champion or not skin_name or champion not in self.skins_data:
@@ -97,45 +101,156 @@ class SkinWebServer:
         
         return None
     
+    def preview_path(self, skin_id):
+        """皮肤预览图的本地路径"""
+        return os.path.join(os.getcwd(), "id_skins", f"{skin_id}.jpg")
+    
+    def cached_preview(self, key, path, mimetype):
+        """预览图响应，命中内存缓存直接返回，未命中时走文件响应(wsgi.file_wrapper/sendfile)，再在后台放入缓存"""
+        data = self.preview_cache.get(key)
+        if data is not None:
+            response = Response(data, mimetype=mimetype)
+            response.cache_control.public = True
+            response.cache_control.max_age = PREVIEW_MAX_AGE
+            return response
+        try:
+            response = send_file(path, mimetype=mimetype, max_age=PREVIEW_MAX_AGE)
+        except FileNotFoundError:
+            return jsonify({"error": "Preview not found"}), 404
+        self.supervisor.submit(self.preview_cache.load, key, path)
+        return response
+    
+    def warm_previews(self, champion, skins):
+        """预热当前英雄所有皮肤的预览图"""
+        entries = []
+        for skin in skins:
+            skin_id = self.get_skin_id(champion, skin)
+            if skin_id:
+                entries.append((skin_id, self.preview_path(skin_id)))
+        self.preview_cache.warm(entries)
+    
+    def get_session(self):
+        """请求对应的客户端会话，通过 ?session= 指定，缺省为默认会话"""
+        if not self.sessions:
+            return None
+        return self.sessions.get(request.args.get('session'))
+    
+    def coalesce(self, session, func):
+        """同一会话下完全相同的请求(路径和参数)并发时共享一次计算结果"""
+        return self.flight.do((session.id, request.full_path), func)
+    
+    def get_skin_sizes(self, session):
+        """当前英雄各皮肤mod解压后的大小"""
+        sizes = {}
+        if not self.zip_index or not session or not session.current_champion:
+            return sizes
+        for skin in session.available_skins:
+            entry = self.zip_index.lookup(session.current_champion, skin)
+            if entry and entry.get("valid"):
+                sizes[skin] = entry["uncompressed"]
+        return sizes
+    
+    def render_index(self, session):
+        """渲染首页并缓存各压缩编码的结果"""
+        try:
+            template_mtime = os.path.getmtime(os.path.join(self.app.template_folder, 'index.html'))
+        except OSError:
+            template_mtime = None
+        session_id = session.id if session else None
+        champion = session.current_champion if session else None
+        skins = session.available_skins if session else []
+        key = (champion, tuple(skins), template_mtime)
+        with self.index_lock:
+            cached = self.index_cache.get(session_id)
+            if cached and cached[0] == key:
+                return cached[1]
+        html = render_template('index.html', 
+                            champion=champion, 
+                            skins=skins)
+        asset = PrecompressedAsset(html.encode('utf-8'), 'text/html')
+        with self.index_lock:
+            self.index_cache[session_id] = (key, asset)
+        return asset
+    
     def register_routes(self):
         @self.app.route('/')
         def index():
-            return render_template('index.html', 
-                                champion=self.current_champion, 
-                                skins=self.available_skins)
+            return self.render_index(self.get_session()).response(self.app.response_class)
         
         @self.app.route('/api/select_skin', methods=['POST'])
         def select_skin():
             data = request.json
             selected_skin = data.get('skin')
+            selected_chroma = data.get('chroma')
+            session = self.get_session()
+            current_champion = session.current_champion if session else None
             
-            if not selected_skin or not self.current_champion:
+            if not selected_skin or not current_champion:
                 return jsonify({"success": False, "message": "无效的选择"})
+            # 注入到该会话对应客户端的游戏目录
+            modtools = session.modtools
             
-            skin_path = f"skins\\{self.current_champion}\\{selected_skin}.zip"
-            success = self.modtools.importMod(skin_path)
+            # 选择了炫彩时直接使用索引中的路径
+            if selected_chroma:
+                chroma = self.chromas.find(current_champion, selected_skin, selected_chroma)
+                if not chroma:
+                    return jsonify({"success": False, "message": f"未找到炫彩: {selected_chroma}"})
+                if modtools.use_cached_profile(chroma["name"], chroma["path"]):
+                    modtools.runOverlay()
+                    return jsonify({"success": True, "message": f"已应用炫彩: {chroma['name']}"})
+                if self.zip_index:
+                    ok, error = self.zip_index.check(chroma["path"])
+                    if not ok:
+                        return jsonify({"success": False, "message": f"炫彩压缩包损坏: {error}"})
+                if not modtools.importMod(chroma["path"]):
+                    return jsonify({"success": False, "message": f"导入炫彩失败: {chroma['path']}"})
+                if not modtools.saveProfile(chroma["name"], chroma["path"]):
+                    return jsonify({"success": False, "message": "保存配置文件失败"})
+                modtools.runOverlay()
+                return jsonify({"success": True, "message": f"已应用炫彩: {chroma['name']}"})
             
-            # 导入失败，尝试处理特殊英雄名称(适配lol-skins 老改名干什么玩意)
+            # 优先使用zip索引定位压缩包
+            indexed_path = self.zip_index.path_of(current_champion, selected_skin) if self.zip_index else None
+            skin_path = indexed_path or f"skins\\{current_champion}\\{selected_skin}.zip"
+            # 处理特殊英雄名称(适配lol-skins 老改名干什么玩意)
+            processed_champion = current_champion.replace("AurelionSol","Aurelion Sol").replace("BelVeth","Bel'Veth").replace("ChoGath","Cho'Gath").replace("KhaZix","Kha'Zix").replace("Rakan","Rakan") \
+            .replace("DrMundo","Dr. Mundo").replace("JarvanIV","Jarvan IV").replace("Khazix","Kha'Zix").replace("KogMaw","Kog'Maw") \
+            .replace("LeeSin","Lee Sin").replace("MasterYi","Master Yi").replace("MissFortune","Miss Fortune") \
+            .replace("Nunu","Nunu & Willump").replace("RekSai","Rek'Sai").replace("RenataGlasc","Renata Glasc").replace("TahmKench","Tahm Kench") \
+            .replace("Velkoz","Vel'Koz").replace("XinZhao","Xin Zhao").replace("KSante","K'Sante").replace("Kaisa","Kai'Sa")
+            fallback_path = f"skins\\{processed_champion}\\{selected_skin}.zip"
+            # 配置缓存按实际导入的压缩包区分，改名英雄的压缩包只在新名称目录下时直接使用新路径
+            if not indexed_path and not os.path.exists(skin_path) and os.path.exists(fallback_path):
+                skin_path = fallback_path
+
+            # 最近应用过同一压缩包时直接切换到缓存的配置
+            if modtools.use_cached_profile(selected_skin, skin_path):
+                modtools.runOverlay()
+                return jsonify({"success": True, "message": f"已应用皮肤: {selected_skin}"})
+            
+            # 导入前拒绝损坏的压缩包
+            if indexed_path:
+                ok, error = self.zip_index.check(indexed_path)
+                if not ok:
+                    return jsonify({"success": False, "message": f"皮肤压缩包损坏: {error}"})
+            success = modtools.importMod(skin_path)
+            
+            # 导入失败，尝试特殊英雄名称对应的路径
             if not success:
-                # 处理特殊英雄名称
-                processed_champion = self.current_champion.replace("AurelionSol","Aurelion Sol").replace("BelVeth","Bel'Veth").replace("ChoGath","Cho'Gath").replace("KhaZix","Kha'Zix").replace("Rakan","Rakan") \
-                .replace("DrMundo","Dr. Mundo").replace("JarvanIV","Jarvan IV").replace("Khazix","Kha'Zix").replace("KogMaw","Kog'Maw") \
-                .replace("LeeSin","Lee Sin").replace("MasterYi","Master Yi").replace("MissFortune","Miss Fortune") \
-                .replace("Nunu","Nunu & Willump").replace("RekSai","Rek'Sai").replace("RenataGlasc","Renata Glasc").replace("TahmKench","Tahm Kench") \
-                .replace("Velkoz","Vel'Koz").replace("XinZhao","Xin Zhao").replace("KSante","K'Sante").replace("Kaisa","Kai'Sa")
-                
-                # 再次尝试导入
-                skin_path = f"skins\\{processed_champion}\\{selected_skin}.zip"
-                success = self.modtools.importMod(skin_path)
+                if fallback_path == skin_path:
+                    return jsonify({"success": False, "message": f"导入皮肤失败: {skin_path}"})
+                skin_path = fallback_path
+                success = modtools.importMod(skin_path)
                 if not success:
                     return jsonify({"success": False, "message": f"导入皮肤失败: {skin_path}"})
             
-            success = self.modtools.saveProfile(selected_skin)
+            # 配置指纹使用实际导入的压缩包
+            success = modtools.saveProfile(selected_skin, skin_path)
             if not success:
                 return jsonify({"success": False, "message": "保存配置文件失败"})
             
-            # 启动overlay
-            self.overlay_thread, self.overlay_stop_event = self.modtools.runOverlay()
+            # 启动overlay，会替换之前运行中的overlay
+            modtools.runOverlay()
             
             return jsonify({"success": True, "message": f"已应用皮肤: {selected_skin}"})
         
@@ -151,36 +266,130 @@ class SkinWebServer:
             if not skin_id:
                 return jsonify({"error": f"Skin ID not found for {skin_name}"}), 404
             
-            preview_path = os.path.join(os.getcwd(), "id_skins", f"{skin_id}.jpg")
+            return self.cached_preview(skin_id, self.preview_path(skin_id), 'image/jpeg')
+        
+        # 获取炫彩预览图片
+        @self.app.route('/api/chroma_preview/<skin_name>/<chroma_id>')
+        def get_chroma_preview(skin_name, chroma_id):
+            champion = request.args.get('champion')
+            if not champion:
+                return jsonify({"error": "Champion parameter is required"}), 400
             
-            if os.path.exists(preview_path):
-                return send_file(preview_path, mimetype='image/jpeg')
-            else:
+            chroma = self.chromas.find(champion, skin_name, chroma_id)
+            if not chroma or not chroma["preview"]:
                 return jsonify({"error": "Preview not found"}), 404
+            mimetype = mimetypes.guess_type(chroma["preview"])[0] or 'application/octet-stream'
+            return self.cached_preview(f"chroma:{chroma['preview']}", chroma["preview"], mimetype)
+        
+        # 本地图标镜像
+        @self.app.route('/icons/<version>/<kind>/<name>.png')
+        def get_icon(version, kind, name):
+            icon_dir = current_icon_dir()
+            if kind not in ICON_KINDS:
+                return jsonify({"error": "Unknown icon kind"}), 404
+            if icon_dir and os.path.basename(icon_dir) == version and os.path.exists(os.path.join(icon_dir, kind, f"{name}.png")):
+                return send_from_directory(os.path.join(icon_dir, kind), f"{name}.png", max_age=ICON_MAX_AGE)
+            # 本地缺失时回退到CDN
+            return redirect(f"{ICON_CDN}/{kind}/{name}.png")
+        
+        @self.app.route('/icons/<version>/atlas.png')
+        def get_icon_atlas_image(version):
+            icon_dir = current_icon_dir()
+            if not icon_dir or os.path.basename(icon_dir) != version:
+                return jsonify({"error": "Atlas not found"}), 404
+            return send_from_directory(icon_dir, "atlas.png", max_age=ICON_MAX_AGE)
+        
+        @self.app.route('/api/icon_atlas')
+        def get_icon_atlas():
+            icon_dir = current_icon_dir()
+            if not icon_dir:
+                return jsonify({"version": None, "atlas": None})
+            atlas = None
+            try:
+                atlas = fast_json.load_file(os.path.join(icon_dir, "atlas.json"))
+            except Exception:
+                pass
+            return jsonify({"version": os.path.basename(icon_dir), "atlas": atlas})
+        
+        # 跨英雄搜索皮肤，支持前缀和模糊匹配
+        @self.app.route('/api/search')
+        def search_skins():
+            query = request.args.get('q', '')
+            limit = min(request.args.get('limit', SEARCH_LIMIT, type=int), 100)
+            self.refresh_catalog()
+            results = self.search_index.search(query, limit)
+            for result in results:
+                result["placeholder"] = self.placeholders.get(result["id"])
+            return jsonify({"query": query, "results": results})
+        
+        # 所有客户端会话
+        @self.app.route('/api/sessions')
+        def get_sessions():
+            sessions = self.sessions.list() if self.sessions else []
+            default = self.sessions.get() if self.sessions else None
+            return jsonify({
+                "sessions": [session.to_dict() for session in sessions],
+                "default": default.id if default else None
+            })
+        
+        # LCU请求调度器的队列深度和等待时间
+        @self.app.route('/api/lcu_stats')
+        def get_lcu_stats():
+            sessions = self.sessions.list() if self.sessions else []
+            return jsonify({
+                "routes": {"coalescing": self.flight.stats()},
+                "sessions": {
+                    session.id: {
+                        "governor": session.game_api.governor.stats(),
+                        "coalescing": session.game_api.flight.stats()
+                    }
+                    for session in sessions
+                }
+            })
+        
+        # 后台历史战绩抓取的进度，POST时开始抓取(默认为当前账号)
+        @self.app.route('/api/history_crawler', methods=['GET', 'POST'])
+        def history_crawler():
+            session = self.get_session()
+            if not session:
+                return jsonify({"error": "Game stats not initialized"}), 500
+            if request.method == 'POST':
+                puuid = (request.get_json(silent=True) or {}).get('puuid')
+                session.crawler.start(puuid)
+            return jsonify(session.crawler.status)
         
         # 添加获取当前英雄和皮肤数据的API
         @self.app.route('/api/current_data')
         def get_current_data():
+            session = self.get_session()
+            champion = session.current_champion if session else None
+            skins = session.available_skins if session else []
             # 获取当前英雄的皮肤数据，包括ID
             skins_with_data = []
-            if self.current_champion in self.skins_data:
-                for skin_data in self.skins_data[self.current_champion]:
-                    if skin_data["name"] in self.available_skins:
-                        skins_with_data.append(skin_data)
+            if champion in self.skins_data:
+                for skin_data in self.skins_data[champion]:
+                    if skin_data["name"] in skins:
+                        skins_with_data.append(dict(skin_data, placeholder=self.placeholders.get(skin_data["id"])))
             
             return jsonify({
-                "champion": self.current_champion,
-                "skins": self.available_skins,
-                "skins_data": skins_with_data
+                "session": session.id if session else None,
+                "champion": champion,
+                "skins": skins,
+                "skins_data": skins_with_data,
+                "chromas": self.chromas.summary(champion) if champion else {},
+                "sizes": self.get_skin_sizes(session),
+                "phase": session.scheduler.phase if session else None,
+                "pollInterval": session.scheduler.client_poll_interval() if session else 1000
             })
         
         # 添加获取队友战绩的API
         @self.app.route('/api/teammates_stats')
         def get_teammates_stats():
-            if not self.game_stats:
+            session = self.get_session()
+            if not session:
                 return jsonify({"error": "Game stats not initialized"}), 500
             mode = request.args.get('mode')
-            stats = self.game_stats.get_teammates_stats(mode=mode)
+            stats = self.coalesce(session, lambda: session.game_stats.get_teammates_stats(mode=mode))
             if stats:
                 return jsonify(stats)
             return jsonify({"error": "无法获取队友战绩"}), 500
@@ -188,19 +397,37 @@ class SkinWebServer:
         # 添加获取当前游戏玩家的API
         @self.app.route('/api/current_players')
         def get_current_players():
-            if not self.game_stats:
+            session = self.get_session()
+            if not session:
                 return jsonify({"error": "Game stats not initialized"}), 500
             
-            players = self.game_stats.get_current_game_players()
+            players = self.coalesce(session, session.game_stats.get_current_game_players)
             if players:
                 return jsonify(players)
             return jsonify({"error": "无法获取当前游戏玩家信息"}), 500
 
+        # 添加获取玩家聚合战绩的API
+        @self.app.route('/api/players_aggregate')
+        def get_players_aggregate():
+            session = self.get_session()
+            if not session:
+                return jsonify({"error": "Game stats not initialized"}), 500
+            ids = request.args.get('summoner_ids')
+            summoner_ids = [i for i in ids.split(',') if i] if ids else None
+            count = request.args.get('count', 20, type=int)
+            mode = request.args.get('mode')
+            with_detail = request.args.get('detail', '0') == '1'
+            aggregate = self.coalesce(session, lambda: session.game_stats.get_players_aggregate(summoner_ids, count=count, mode=mode, with_detail=with_detail))
+            if aggregate is not None:
+                return jsonify(aggregate)
+            return jsonify({"error": "无法获取聚合战绩"}), 500
+
         @self.app.route('/api/match_detail/<game_id>')
         def get_match_detail(game_id):
-            if not self.game_stats:
+            session = self.get_session()
+            if not session:
                 return jsonify({"error": "Game stats not initialized"}), 500
-            detail = self.game_stats.get_match_detail(game_id)
+            detail = self.coalesce(session, lambda: session.game_stats.get_match_detail(game_id))
             if detail:
                 return jsonify(detail)
             return jsonify({"error": "无法获取对局详情"}), 500
@@ -208,41 +435,43 @@ class SkinWebServer:
         # 添加通过 Summoner ID 获取指定召唤师战绩的API
         @self.app.route('/api/summoner_match_history_by_id/<int:summoner_id>')
         def get_summoner_match_history_by_id(summoner_id):
-            if not self.game_stats:
+            session = self.get_session()
+            if not session:
                 return jsonify({"error": "Game stats not initialized"}), 500
             # 默认获取全部模式的战绩，从请求参数中获取模式
             mode = request.args.get('mode', 'ALL')
-            match_history = self.game_stats.get_player_match_history(summoner_id, mode=mode) # 传递模式参数
+            match_history = self.coalesce(session, lambda: session.game_stats.get_player_match_history(summoner_id, mode=mode)) # 传递模式参数
             if match_history is not None:
                 # 返回战绩列表
                 return jsonify({"matchHistory": match_history})
             # 注意：通过ID获取可能无法直接获取名字，前端需要自己处理显示
             return jsonify({"error": f"无法获取召唤师 (ID: {summoner_id}) 的战绩"}), 500
 
-    def update_champion_data(self, champion, skins):
-        """更新当前英雄和可用皮肤数据"""
-        self.current_champion = champion
-        self.available_skins = skins
-        logging.info(f"Web服务器已更新英雄数据: {champion}, 皮肤数量: {len(skins)}")
+    def warm_champion(self, champion, skins):
+        """会话切换英雄后预热共享的炫彩索引和预览图"""
+        # 首次选择该英雄时在后台建立炫彩索引
+        self.supervisor.submit(self.chromas.get, champion)
+        # 预热当前英雄的预览图
+        self.supervisor.submit(self.warm_previews, champion, skins)
     
     def start(self, port=5000):
-        """在新线程中启动Web服务器"""
+        """由任务管理器启动Web服务器"""
         global targetPort
         targetPort = port
-        def run_server():
-            import logging as flask_logging
-            flask_logging.getLogger('werkzeug').setLevel(flask_logging.ERROR)
-            # 修改为threaded=True确保请求能被正确处理
-            self.app.run(host='127.0.0.1', port=port, debug=False, threaded=True, use_reloader=False)
-    
-        self.server_thread = threading.Thread(target=run_server)
-        self.server_thread.daemon = True
-        self.server_thread.start()
+        self.port = port
+        import logging as flask_logging
+        flask_logging.getLogger('werkzeug').setLevel(flask_logging.ERROR)
+        # threaded=True确保请求能被正确处理
+        self.server = make_server('127.0.0.1', port, self.app, threaded=True)
+    
+        def run_server(task):
+            self.server.serve_forever(poll_interval=0.1)
+    
+        task = self.supervisor.spawn("web_server", run_server, order=10, on_cancel=self.server.shutdown)
         logging.info(f"Web服务器已启动，访问 http://127.0.0.1:{targetPort}")
-        return self.server_thread
+        return task
     
-    def open_browser(self):
-        """打开浏览器访问Web页面"""
-        webBrowser = webbrowser.get(using='windows-default')  # 使用系统默认
-        webBrowser.open("http://127.0.0.1:18081")
-        logging.info("已打开浏览器")
\ No newline at end of file
+    def stop(self):
+        """停止Web服务器"""
+        if self.supervisor.cancel("web_server"):
+            logging.info("Web服务器已停止")
@@ -0,0 +1,171 @@
+import os
+import zlib
+import struct
+import logging
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from chroma_index import ChromaIndex
+import fast_json
+
+ZIP_INDEX_PATH = "zip_index.json"
+MAX_WORKERS = 8
+
+
+class ZipIndex:
+    """皮肤zip中央目录索引
+
+    只读取zip的中央目录，记录条目数量、解压后大小、CRC摘要和涉及的WAD文件，
+    不解压任何内容。索引并行构建并保存为紧凑的json，只有修改过的zip会重新读取。
+    应用皮肤前通过索引即可拒绝损坏的压缩包。
+    """
+
+    def __init__(self, skins_path=None, index_path=ZIP_INDEX_PATH):
+        self.skins_path = skins_path or os.path.join(os.getcwd(), "skins")
+        self.index_path = index_path
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self.by_skin = {}
+        self._rebuild_lookup()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            return fast_json.load_file(self.index_path)
+        except Exception as e:
+            logging.warning(f"zip索引读取失败，将重新构建: {e}")
+            return {}
+
+    def _save(self):
+        # 先写临时文件再替换，写入中断不会损坏已有索引
+        fast_json.dump_file(self.index_path, self.entries, indent=False)
+
+    def _rebuild_lookup(self):
+        """建立 (英雄, 皮肤名) -> 相对路径 的查找表"""
+        by_skin = {}
+        for rel_path in self.entries:
+            parts = rel_path.split("/")
+            if len(parts) == 2:
+                by_skin[(ChromaIndex.normalize(parts[0]), parts[1][:-4])] = rel_path
+        self.by_skin = by_skin
+
+    @staticmethod
+    def read_central_directory(path):
+        """读取单个zip的中央目录信息"""
+        stat = os.stat(path)
+        entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+        try:
+            with zipfile.ZipFile(path) as zf:
+                infos = zf.infolist()
+        except (zipfile.BadZipFile, OSError) as e:
+            entry.update({"valid": False, "error": str(e)})
+            return entry
+
+        crc = 0
+        uncompressed = 0
+        wads = set()
+        for info in infos:
+            crc = zlib.crc32(struct.pack("<I", info.CRC), crc)
+            uncompressed += info.file_size
+            # 本地文件头必须落在文件内
+            if info.header_offset + info.compress_size > stat.st_size:
+                entry.update({"valid": False, "error": f"条目越界: {info.filename}"})
+                return entry
+            for part in info.filename.replace("\\", "/").split("/"):
+                if part.lower().endswith((".wad.client", ".wad")):
+                    wads.add(part)
+                    break
+
+        if not infos:
+            entry.update({"valid": False, "error": "压缩包为空"})
+            return entry
+        entry.update({
+            "valid": True,
+            "entries": len(infos),
+            "uncompressed": uncompressed,
+            "crc": f"{crc:08x}",
+            "wads": sorted(wads)
+        })
+        return entry
+
+    def refresh(self, max_workers=MAX_WORKERS):
+        """并行刷新索引，只读取新增或修改过的zip"""
+        if not os.path.exists(self.skins_path):
+            return
+        current = {}
+        for champion in os.listdir(self.skins_path):
+            champion_path = os.path.join(self.skins_path, champion)
+            if not os.path.isdir(champion_path):
+                continue
+            for skin in os.listdir(champion_path):
+                if skin.endswith(".zip"):
+                    path = os.path.join(champion_path, skin)
+                    current[f"{champion}/{skin}"] = path
+
+        changed = []
+        for rel_path, path in current.items():
+            cached = self.entries.get(rel_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not cached or cached.get("mtime") != stat.st_mtime_ns or cached.get("size") != stat.st_size:
+                changed.append(rel_path)
+
+        removed = [p for p in self.entries if p.count("/") == 1 and p not in current]
+        if not changed and not removed:
+            logging.info(f"zip索引无需更新，共 {len(self.entries)} 个压缩包")
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self.read_central_directory, [current[p] for p in changed])
+            updated = dict(zip(changed, results))
+
+        with self.lock:
+            self.entries.update(updated)
+            for rel_path in removed:
+                del self.entries[rel_path]
+            self._rebuild_lookup()
+            self._save()
+        invalid = [p for p in changed if not updated[p].get("valid")]
+        logging.info(f"zip索引已更新: {len(changed)} 个变化, {len(removed)} 个删除, {len(invalid)} 个损坏")
+
+    def get(self, path):
+        """获取任意zip的索引，不在索引中或已修改时即时读取"""
+        rel_path = os.path.relpath(path, self.skins_path).replace("\\", "/")
+        with self.lock:
+            entry = self.entries.get(rel_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if entry and entry.get("mtime") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+            return entry
+        entry = self.read_central_directory(path)
+        with self.lock:
+            self.entries[rel_path] = entry
+        return entry
+
+    def lookup(self, champion, skin_name):
+        """根据英雄和皮肤名获取索引"""
+        rel_path = self.by_skin.get((ChromaIndex.normalize(champion), skin_name))
+        return self.entries.get(rel_path) if rel_path else None
+
+    def path_of(self, champion, skin_name):
+        """根据英雄和皮肤名获取zip的本地路径"""
+        rel_path = self.by_skin.get((ChromaIndex.normalize(champion), skin_name))
+        return os.path.join(self.skins_path, *rel_path.split("/")) if rel_path else None
+
+    def check(self, path):
+        """应用前检查压缩包是否完好
+
+        Returns:
+            tuple: (是否可用, 错误信息)
+        """
+        entry = self.get(path)
+        if entry is None:
+            return False, "压缩包不存在"
+        if not entry.get("valid"):
+            return False, entry.get("error", "压缩包损坏")
+        return True, None